@@ -17,20 +17,37 @@ EPOCH_ID        = 0x40C
 KNOB_ID         = 0x518
 TEMP_ID         = 0x51A
 
+# Precompiled big-endian wire formats: [ID_32][value]
+_U32U32 = struct.Struct('>II')
+_U32U16 = struct.Struct('>IH')
+_U32F   = struct.Struct('>If')
+_U32    = struct.Struct('>I')
+_ACK    = struct.Struct('>I4x')  # node ID + 4 zero bytes
+
 synced_nodes = set()
 
+_hms_last = (None, "")
+
+def _now_hms():
+    """Current time as HH:MM:SS; strftime runs at most once per second."""
+    global _hms_last
+    t = int(time.time())
+    if _hms_last[0] != t:
+        _hms_last = (t, time.strftime('%H:%M:%S', time.localtime(t)))
+    return _hms_last[1]
+
 def send_rtc_sync(bus, node_id):
     """Packs the current Unix time and sends it to the node."""
     now = int(time.time())
     # Payload: [4 bytes Node ID][4 bytes Timestamp]
-    payload = struct.pack('>I', node_id) + struct.pack('>I', now)
+    payload = _U32U32.pack(node_id, now)
     sync_msg = can.Message(
         arbitration_id=EPOCH_ID,
         data=payload,
         is_extended_id=False
     )
     bus.send(sync_msg)
-    print(f"[{time.strftime('%H:%M:%S')}] RTC SYNC: Sent {now} to Node {hex(node_id)}")
+    print(f"[{_now_hms()}] RTC SYNC: Sent {now} to Node {hex(node_id)}")
 
 def main():
     try:
@@ -46,7 +63,7 @@ def main():
             if msg.arbitration_id == EPOCH_ID:
                 try:
                     # Heartbeat is still 8 bytes
-                    node_id, unix_ts = struct.unpack('>II', msg.data)
+                    node_id, unix_ts = _U32U32.unpack(msg.data)
                     dt_object = datetime.fromtimestamp(unix_ts)
                     print(f"HEARTBEAT from Node 0x{node_id:08X} {dt_object.strftime('%Y-%m-%d %H:%M:%S')}")
                     send_rtc_sync(bus, node_id)
@@ -58,9 +75,9 @@ def main():
                 try:
                     # Bytes 0-3: Node ID (I)
                     # Bytes 4-5: Sensor Value (H - unsigned short)
-                    # We only slice the first 6 bytes to avoid the struct.error
-                    node_id, knob_val = struct.unpack('>IH', msg.data[0:6])
-                    print(f"[{time.strftime('%H:%M:%S')}] NODE: {hex(node_id)} | KNOB ADC: {knob_val} mV")
+                    # unpack_from reads only the first 6 bytes, so the 7th doesn't raise struct.error
+                    node_id, knob_val = _U32U16.unpack_from(msg.data)
+                    print(f"[{_now_hms()}] NODE: {hex(node_id)} | KNOB ADC: {knob_val} mV")
                 except struct.error:
                     print(f"Error: Malformed 0x518 packet (Len: {len(msg.data)})")
 
@@ -71,18 +88,18 @@ def main():
                     # I : 4-byte Unsigned Int (Node ID)
                     # f : 4-byte Float (CPU Temp)
                     # Total = 8 bytes
-                    node_id, celsius = struct.unpack('>If', msg.data)
-                    print(f"[{time.strftime('%H:%M:%S')}] NODE: {hex(node_id)} | CPU TEMP: {celsius:.2f} °C")
+                    node_id, celsius = _U32F.unpack(msg.data)
+                    print(f"[{_now_hms()}] NODE: {hex(node_id)} | CPU TEMP: {celsius:.2f} °C")
                 except struct.error:
                     print(f"Error: Malformed 0x51A packet (Len: {len(msg.data)})")
 
             # --- Handle Intro/Handshaking (0x700 range) ---
-            if 0x700 <= msg.arbitration_id <= 0x7FF:
+            elif 0x700 <= msg.arbitration_id <= 0x7FF:
                 if len(msg.data) >= 4:
-                    remote_node_id = struct.unpack('>I', msg.data[0:4])[0]
-                    print(f"[{time.strftime('%H:%M:%S')}] INTRO PKT: {hex(msg.arbitration_id)} from {hex(remote_node_id)}")
+                    remote_node_id = _U32.unpack_from(msg.data)[0]
+                    print(f"[{_now_hms()}] INTRO PKT: {hex(msg.arbitration_id)} from {hex(remote_node_id)}")
                     
-                    ack_payload = struct.pack('>I', remote_node_id) + b'\x00\x00\x00\x00'
+                    ack_payload = _ACK.pack(remote_node_id)
                     ack_msg = can.Message(arbitration_id=ACK_ID, data=ack_payload, is_extended_id=False)
                     bus.send(ack_msg)
 
@@ -6,7 +6,7 @@ import queue
 import json
 import os
 import csv
-from collections import deque
+from collections import deque, namedtuple
 import platform
 import sys
 import argparse
@@ -51,10 +51,25 @@ ID_MAP_KEYS = {
     "COLORPICKER_ADD_NODE": "COLORPICKER_ADD_NODE_ID"
 }
 
+# Message IDs as a namedtuple; each App applies its CSV overrides on top of these defaults
+MsgIds = namedtuple('MsgIds', ID_MAP_KEYS.values())
+DEFAULT_MSG_IDS = MsgIds(**{var_name: globals()[var_name] for var_name in MsgIds._fields})
+
 # --- Constants ---
 TARGET_CYD_ID         = 0x792      # CAN ID for the CYD hardware
 HISTORY_FILE          = "cmd_history.json"
 CSV_HEADER_ROW_START  = 6          # Rows to skip in CSV for message definitions
+UI_REFRESH_SECONDS    = 0.1        # Redraw interval when no keys are pressed
+
+def _next_key(buf: bytes):
+    """ Split the first key off raw stdin bytes: a whole CSI or SS3 escape sequence (arrows etc.) or one byte """
+    if buf[:2] == b'\x1b[':
+        i = 2
+        while i < len(buf) and not 0x40 <= buf[i] <= 0x7E: i += 1
+        return buf[:i + 1], buf[i + 1:]
+    if buf[:2] == b'\x1bO':  # SS3, sent for arrows in application cursor mode: always one final byte
+        return buf[:3], buf[3:]
+    return buf[:1], buf[1:]
 
 class CANState:
     def __init__(self, logger):
@@ -77,38 +92,51 @@ class App:
         self.state = CANState(self)
         self.q = queue.Queue()
         self.stop_event = threading.Event()
+        self._wake = threading.Event()  # set by the reader whenever a frame is queued
         self.reader = threading.Thread(target=self._reader_loop, daemon=True)
         self.is_windows = (platform.system().lower() == "windows")
         self.selected_idx = 0
         self.interaction_active = False
         self.detail_node = None 
         self.picker_buffer = set()  # Tracks staged nodes for the CYD
+        self._key_buf = b''  # raw stdin bytes read but not yet returned as keys
 
-        if csv_path:
-            self._load_definitions_from_csv(csv_path)
+        found = self._load_definitions_from_csv(csv_path) if csv_path else {}
+        self.ids = DEFAULT_MSG_IDS._replace(**found)
 
     def _load_definitions_from_csv(self, path):
         """
         @brief Load CAN ID definitions from a CSV file.
+        @return Dict of MsgIds field name -> ID for every 'c def' found in the file.
         """
+        found = {}
         try:
-            with open(path, 'r') as f:
+            with open(path, 'r', encoding='utf-8-sig', newline='') as f:
                 reader = csv.reader(f)
-                for _ in range(CSV_HEADER_ROW_START): next(reader)
-                for row in reader:
-                    if len(row) < 2: continue
-                    name, hex_id = row[0], row[1]
-                    for key, var_name in ID_MAP_KEYS.items():
-                        if key in name:
-                            globals()[var_name] = int(hex_id, 16)
-        except Exception as e:
+                # Skip records rather than lines, since a quoted cell can span several lines
+                for _ in range(CSV_HEADER_ROW_START - 1): next(reader, None)
+                # Header cells contain embedded newlines ("Message\nID")
+                header = [h.replace('\n', ' ').strip() for h in next(reader, ())]
+                for col in ('c def', 'Message ID'):
+                    if col not in header:
+                        print(f"CSV Load Error: no '{col}' column in row {CSV_HEADER_ROW_START} of {path}")
+                        return found
+                for record in reader:
+                    row = dict(zip(header, record))
+                    var_name = ID_MAP_KEYS.get((row.get('c def') or '').strip())
+                    if var_name:
+                        found[var_name] = int(row.get('Message ID', ''), 0)
+        except (OSError, csv.Error, ValueError) as e:
             print(f"CSV Load Error: {e}")
+        return found
 
     def _reader_loop(self):
         while not self.stop_event.is_set():
             try:
                 msg = self.bus.recv(timeout=0.1)
-                if msg: self.q.put(msg)
+                if msg:
+                    self.q.put(msg)
+                    self._wake.set()
             except Exception: pass
 
     def _process_queue(self):
@@ -120,7 +148,7 @@ class App:
                 node_id = struct.unpack('>I', data[0:4])[0]
                 node = self.state.touch(node_id)
                 node['sub_mod_cnt'] = data[4] if len(data) > 4 else 0
-                self.bus.send(can.Message(arbitration_id=ACK_INTRO_ID, data=struct.pack('>I', node_id)))
+                self.bus.send(can.Message(arbitration_id=self.ids.ACK_INTRO_ID, data=struct.pack('>I', node_id)))
             elif len(data) >= 4:
                 try:
                     nid = struct.unpack('>I', data[0:4])[0]
@@ -160,7 +188,7 @@ class App:
 
     def run(self):
         self.reader.start()
-        self.bus.send(can.Message(arbitration_id=REQ_NODE_INTRO_ID, data=[0]*4))
+        self.bus.send(can.Message(arbitration_id=self.ids.REQ_NODE_INTRO_ID, data=[0]*4))
         
         # Terminal Setup
         self.term_orig = None
@@ -171,7 +199,12 @@ class App:
 
         try:
             with Live(self._build_layout(), refresh_per_second=10, screen=True) as live:
+                next_draw = time.monotonic()
                 while not self.stop_event.is_set():
+                    # Sleep until a frame arrives or the next redraw is due, but not while typed keys are pending
+                    timeout = 0.0 if self._key_buf else max(0.0, next_draw - time.monotonic())
+                    if self._wake.wait(timeout=timeout):
+                        self._wake.clear()
                     if not self.interaction_active:
                         self._process_queue()
                         key = self._get_key()
@@ -191,11 +224,18 @@ class App:
                                 if target in self.picker_buffer: self.picker_buffer.remove(target)
                         elif key == 'l':
                             if node_ids and node_ids[self.selected_idx % len(node_ids)] == TARGET_CYD_ID:
+                                # One frame reused for the whole burst; payload is [ID_32][0,0,0,0]
+                                add_msg = can.Message(arbitration_id=self.ids.COLORPICKER_ADD_NODE_ID, data=bytearray(8))
+                                next_t = time.monotonic()
                                 for nid in self.picker_buffer:
-                                    data = struct.pack(">I", nid) + b'\x00\x00\x00\x00'
-                                    self.bus.send(can.Message(arbitration_id=COLORPICKER_ADD_NODE_ID, data=data))
-                                    time.sleep(0.02)
-                                self.bus.send(can.Message(arbitration_id=COLORPICKER_WRITE_NVS_ID, data=[0]*4))
+                                    struct.pack_into(">I", add_msg.data, 0, nid)
+                                    delay = next_t - time.monotonic()
+                                    if delay > 0: time.sleep(delay)
+                                    self.bus.send(add_msg)
+                                    next_t += 0.02
+                                delay = next_t - time.monotonic()
+                                if delay > 0: time.sleep(delay)
+                                self.bus.send(can.Message(arbitration_id=self.ids.COLORPICKER_WRITE_NVS_ID, data=[0]*4))
                         
                         # Original Commands
                         elif key == 'm':
@@ -207,8 +247,12 @@ class App:
                         elif key == 'p': live.stop(); self.persist_selected(); live.start()
                         elif key == 'x': live.stop(); self.erase_selected(); live.start()
                             
-                        live.update(self._build_layout())
-                    time.sleep(0.05)
+                        now = time.monotonic()
+                        if key or now >= next_draw:
+                            live.update(self._build_layout())
+                            next_draw = now + UI_REFRESH_SECONDS
+                    else:
+                        next_draw = time.monotonic() + UI_REFRESH_SECONDS
         finally:
             self._restore_terminal()
             if self.bus:
@@ -224,15 +268,18 @@ class App:
                 return 'up' if ch == 'H' else 'down' if ch == 'P' else None
             return ch.lower()
         else:
-            import select
-            dr, _, _ = select.select([sys.stdin], [], [], 0)
-            if not dr: return None
-            ch = sys.stdin.read(1)
-            if ch == '\x1b':
-                seq = sys.stdin.read(2)
-                if seq == '[A': return 'up'
-                if seq == '[B': return 'down'
-            return ch.lower()
+            if not self._key_buf:
+                import select
+                dr, _, _ = select.select([sys.stdin], [], [], 0)
+                if not dr: return None
+                # Single syscall for everything typed so far instead of 1-3 buffered reads per key
+                self._key_buf = os.read(sys.stdin.fileno(), 64)
+            # Hand out one key per call and keep the rest pending
+            key, self._key_buf = _next_key(self._key_buf)
+            if key in (b'\x1b[A', b'\x1bOA'): return 'up'
+            if key in (b'\x1b[B', b'\x1bOB'): return 'down'
+            if key[:1] == b'\x1b': return None
+            return key.decode(errors='ignore').lower() or None
 
     def _restore_terminal(self):
         if not self.is_windows and self.term_orig:
@@ -11,7 +11,7 @@ import argparse
 import traceback
 import os
 
-from rich.console import Console
+from rich.console import Console, Group
 from rich.table import Table
 from rich.panel import Panel
 from rich.layout import Layout
@@ -33,32 +33,55 @@ TEMP_ID            = 0x51A  # Telemetry: Temp
 
 DEFAULT_CAN_INTERFACE = 'can0'
 LOG_MAX_LINES         = 2000
+UI_REFRESH_SECONDS    = 0.1
+
+# Precompiled big-endian payload unpackers: [ID_32][value]
+_U32    = struct.Struct('>I').unpack_from
+_U32U32 = struct.Struct('>II').unpack_from
+_U32U16 = struct.Struct('>IH').unpack_from
+_U32F   = struct.Struct('>If').unpack_from
+
+# Node status codes reported by CANState.snapshot
+STATUS_SEEN  = 0
+STATUS_MOD   = 1
+STATUS_READY = 2
 
 console = Console()
 
 def safe_traceback():
     return "".join(traceback.format_exception(*sys.exc_info()))
 
+def _next_key(buf: bytes):
+    """ Split the first key off raw stdin bytes: a whole CSI or SS3 escape sequence (arrows etc.) or one byte """
+    if buf[:2] == b'\x1b[':
+        i = 2
+        while i < len(buf) and not 0x40 <= buf[i] <= 0x7E: i += 1
+        return buf[:i + 1], buf[i + 1:]
+    if buf[:2] == b'\x1bO':  # SS3, sent for arrows in application cursor mode: always one final byte
+        return buf[:3], buf[3:]
+    return buf[:1], buf[1:]
+
 class LogBuffer:
     def __init__(self, max_lines=LOG_MAX_LINES):
         self.lines = deque(maxlen=max_lines)
         self.lock = threading.Lock()
 
     def add(self, text: str):
-        ts = time.strftime('%H:%M:%S')
+        # Lines are stored pre-built so renders don't re-join and re-parse the log
+        line = Text(f"[{time.strftime('%H:%M:%S')}] {text}")
         with self.lock:
-            self.lines.append(f"[{ts}] {text}")
+            self.lines.append(line)
 
     def tail(self, n):
         with self.lock:
-            return list(self.lines)[-n:]
+            return Group(*list(self.lines)[-n:])
 
     def write_to_file(self, path: str):
         with self.lock:
             try:
                 with open(path, "a", encoding="utf-8") as f:
                     for line in self.lines:
-                        f.write(line + "\n")
+                        f.write(line.plain + "\n")
             except Exception:
                 pass
 
@@ -71,7 +94,7 @@ class CANState:
 
     def touch(self, node_id: int):
         with self.lock:
-            # heartbeat, knob, temp, last, sub_mod_cnt, reported_crc, subs, interview_complete
+            # heartbeat, knob, temp, last, sub_mod_cnt, reported_crc, subs, subs_done, interview_complete
             nd = self.nodes.setdefault(node_id, {
                 'heartbeat': None, 
                 'knob': None, 
@@ -80,33 +103,27 @@ class CANState:
                 'sub_mod_cnt': 0,
                 'reported_crc': 0,
                 'subs': {},
+                'subs_done': 0,
                 'interview_complete': False
             })
             nd['last'] = time.time()
             return nd
 
-    def snapshot(self):
+    def snapshot(self, now: float):
+        # Raw values only; formatting happens in App._build_table after the lock is released
         with self.lock:
-            ids = sorted(self.nodes.keys())
-            now = time.time()
             rows = []
-            for node_id in ids:
+            for node_id in sorted(self.nodes.keys()):
                 nd = self.nodes[node_id]
-                hb = nd['heartbeat'].strftime('%H:%M:%S') if nd['heartbeat'] else "-"
                 age_secs = int(now - nd['last']) if nd['last'] else None
-                age = f"{age_secs:>3}s" if age_secs is not None else "-"
-                knob = f"{nd['knob']}" if nd['knob'] is not None else "-"
-                temp = f"{nd['temp']:.2f}" if nd['temp'] is not None else "-"
-                
-                # Determine status string
                 if nd['interview_complete']:
-                    status = "[green]Ready[/]"
+                    status = STATUS_READY
                 elif nd['sub_mod_cnt'] > 0:
-                    status = f"[yellow]Mod {len(nd['subs'])}/{nd['sub_mod_cnt']}[/]"
+                    status = STATUS_MOD
                 else:
-                    status = "[white]Seen[/]"
-                
-                rows.append((node_id, hb, age, knob, temp, status, age_secs))
+                    status = STATUS_SEEN
+                rows.append((node_id, nd['heartbeat'], age_secs, nd['knob'], nd['temp'],
+                             status, nd['subs_done'], nd['sub_mod_cnt']))
             return rows
 
 class App:
@@ -121,10 +138,23 @@ class App:
 
         self.q = queue.Queue()
         self.stop_event = threading.Event()
+        self._wake = threading.Event()  # set by the reader whenever a frame is queued
         self.reader_thread = threading.Thread(target=self._reader_loop, daemon=True)
 
         self.log_height = 10
         self.table_scroll = 0
+        self._row_cache = {}  # node_id -> (raw fields, formatted cells, row style)
+
+        # Reused outbound frames; only the payload is rewritten per send
+        self._ack_msg = can.Message(arbitration_id=ACK_INTRO_ID, data=bytearray(4), is_extended_id=False)
+        self._rtc_msg = can.Message(arbitration_id=EPOCH_ID, data=bytearray(8), is_extended_id=False)
+
+        # Fixed-ID frame handlers; the interview range is checked separately
+        self._handlers = {
+            EPOCH_ID: self._on_epoch,
+            KNOB_ID: self._on_knob,
+            TEMP_ID: self._on_temp,
+        }
 
         # Platform key handling
         self.is_windows = (platform.system().lower() == "windows")
@@ -141,6 +171,7 @@ class App:
             self.termios = termios
             self.tty = tty
             self.orig_term_attrs = None
+        self._key_buf = b''  # raw stdin bytes read but not yet returned as keys
 
     def _reader_loop(self):
         while not self.stop_event.is_set():
@@ -148,85 +179,101 @@ class App:
                 msg = self.bus.recv(timeout=0.2)
                 if msg is not None:
                     self.q.put(msg)
+                    self._wake.set()
             except Exception as e:
                 time.sleep(0.1)
 
     def _process_queue(self):
+        # Runs per frame: bind everything the loop touches to locals once
+        get_nowait = self.q.get_nowait
+        get_handler = self._handlers.get
+        on_interview = self._on_interview
+        Empty = queue.Empty
+        view = memoryview
         while True:
             try:
-                msg = self.q.get_nowait()
-            except queue.Empty:
+                msg = get_nowait()
+            except Empty:
                 break
 
             arb_id = msg.arbitration_id
-
-            # 1. Heartbeat
-            if arb_id == EPOCH_ID:
-                if len(msg.data) >= 8:
-                    node_id, unix_ts = struct.unpack('>II', msg.data[:8])
-                    dt = datetime.fromtimestamp(unix_ts)
-                    self.state.touch(node_id)['heartbeat'] = dt
-                    self._send_rtc_sync(node_id) # Optional: keep synced
-
-            # 2. Knob
-            elif arb_id == KNOB_ID:
-                if len(msg.data) >= 6:
-                    node_id, val = struct.unpack('>IH', msg.data[:6])
-                    self.state.touch(node_id)['knob'] = val
-
-            # 3. Temp
-            elif arb_id == TEMP_ID:
-                if len(msg.data) >= 8:
-                    node_id, celsius = struct.unpack('>If', msg.data[:8])
-                    self.state.touch(node_id)['temp'] = celsius
-
-            # 4. Interview Logic (0x700 - 0x7FF)
+            # Handlers read through a view so payload slices don't copy
+            mv = view(msg.data)
+            handler = get_handler(arb_id)
+            if handler:
+                handler(mv)
             elif 0x700 <= arb_id <= 0x7FF:
-                if len(msg.data) >= 7:
-                    try:
-                        node_id = struct.unpack('>I', msg.data[0:4])[0]
-                        node = self.state.touch(node_id)
-                        
-                        # Check if this is Part A/B or Identity
-                        # Identity usually carries the sub_mod_cnt in byte 4
-                        # We use a heuristic: if we haven't seen sub_mod_cnt yet, it's Identity
-                        if node['sub_mod_cnt'] == 0:
-                            node['sub_mod_cnt'] = msg.data[4]
-                            node['reported_crc'] = (msg.data[5] << 8) | msg.data[6]
-                            self.log.add(f"IDENTITY: 0x{node_id:08X} (Type 0x{arb_id:X}, {node['sub_mod_cnt']} Subs, CRC 0x{node['reported_crc']:04X})")
-                        else:
-                            # Sub-module data
-                            mod_idx_byte = msg.data[4]
-                            mod_idx = mod_idx_byte & 0x7F
-                            is_part_b = bool(mod_idx_byte & 0x80)
-                            
-                            if mod_idx not in node['subs']:
-                                node['subs'][mod_idx] = {'cfg': None, 'telemetry': None}
-                            
-                            if not is_part_b:
-                                node['subs'][mod_idx]['cfg'] = msg.data[5:8]
-                                self.log.add(f"INTERVIEW: 0x{node_id:08X} Mod {mod_idx} Part A (Config)")
-                            else:
-                                node['subs'][mod_idx]['telemetry'] = msg.data[5:8]
-                                self.log.add(f"INTERVIEW: 0x{node_id:08X} Mod {mod_idx} Part B (Tele)")
-                                
-                            # If we just finished the last Part B of the last module
-                            if is_part_b and (mod_idx + 1) >= node['sub_mod_cnt']:
-                                node['interview_complete'] = True
-                                self.log.add(f"INTERVIEW COMPLETE: 0x{node_id:08X}")
-
-                        # Trigger the next packet in the node's sendIntroduction() routine
-                        self._send_ack(node_id)
+                on_interview(arb_id, mv)
+
+    # 1. Heartbeat
+    def _on_epoch(self, data):
+        if len(data) >= 8:
+            node_id, unix_ts = _U32U32(data, 0)
+            dt = datetime.fromtimestamp(unix_ts)
+            self.state.touch(node_id)['heartbeat'] = dt
+            self._send_rtc_sync(node_id) # Optional: keep synced
+
+    # 2. Knob
+    def _on_knob(self, data):
+        if len(data) >= 6:
+            node_id, val = _U32U16(data, 0)
+            self.state.touch(node_id)['knob'] = val
+
+    # 3. Temp
+    def _on_temp(self, data):
+        if len(data) >= 8:
+            node_id, celsius = _U32F(data, 0)
+            self.state.touch(node_id)['temp'] = celsius
+
+    # 4. Interview Logic (0x700 - 0x7FF)
+    def _on_interview(self, arb_id, data):
+        if len(data) >= 7:
+            try:
+                node_id = _U32(data, 0)[0]
+                node = self.state.touch(node_id)
+                
+                # Check if this is Part A/B or Identity
+                # Identity usually carries the sub_mod_cnt in byte 4
+                # We use a heuristic: if we haven't seen sub_mod_cnt yet, it's Identity
+                if node['sub_mod_cnt'] == 0:
+                    node['sub_mod_cnt'] = data[4]
+                    node['reported_crc'] = (data[5] << 8) | data[6]
+                    self.log.add(f"IDENTITY: 0x{node_id:08X} (Type 0x{arb_id:X}, {node['sub_mod_cnt']} Subs, CRC 0x{node['reported_crc']:04X})")
+                else:
+                    # Sub-module data
+                    mod_idx_byte = data[4]
+                    mod_idx = mod_idx_byte & 0x7F
+                    is_part_b = bool(mod_idx_byte & 0x80)
+                    
+                    if mod_idx not in node['subs']:
+                        node['subs'][mod_idx] = {'cfg': None, 'telemetry': None}
+                    
+                    if not is_part_b:
+                        node['subs'][mod_idx]['cfg'] = data[5:8].tobytes()
+                        self.log.add(f"INTERVIEW: 0x{node_id:08X} Mod {mod_idx} Part A (Config)")
+                    else:
+                        # Count each module once, whatever order the Part B frames arrive in
+                        if node['subs'][mod_idx]['telemetry'] is None:
+                            node['subs_done'] += 1
+                        node['subs'][mod_idx]['telemetry'] = data[5:8].tobytes()
+                        self.log.add(f"INTERVIEW: 0x{node_id:08X} Mod {mod_idx} Part B (Tele)")
                         
-                    except Exception as e:
-                        self.log.add(f"Interview Error: {e}")
+                    # If we just finished the last outstanding Part B
+                    if is_part_b and node['subs_done'] >= node['sub_mod_cnt']:
+                        node['interview_complete'] = True
+                        self.log.add(f"INTERVIEW COMPLETE: 0x{node_id:08X}")
+
+                # Trigger the next packet in the node's sendIntroduction() routine
+                self._send_ack(node_id)
+                
+            except Exception as e:
+                self.log.add(f"Interview Error: {e}")
 
     def _send_ack(self, node_id: int):
         if self.dry_run: return
-        payload = struct.pack('>I', node_id) # 4 bytes Big Endian
-        msg = can.Message(arbitration_id=ACK_INTRO_ID, data=payload, is_extended_id=False)
+        struct.pack_into('>I', self._ack_msg.data, 0, node_id) # 4 bytes Big Endian
         try:
-            self.bus.send(msg)
+            self.bus.send(self._ack_msg)
         except Exception: pass
 
     def _send_rtc_sync(self, node_id: int):
@@ -235,10 +282,9 @@ class App:
         last = self.state.last_sync.get(node_id, 0)
         if now - last < 10.0: return
         self.state.last_sync[node_id] = now
-        payload = struct.pack('>II', node_id, int(now))
-        msg = can.Message(arbitration_id=EPOCH_ID, data=payload, is_extended_id=False)
+        struct.pack_into('>II', self._rtc_msg.data, 0, node_id, int(now))
         try:
-            self.bus.send(msg)
+            self.bus.send(self._rtc_msg)
         except Exception: pass
 
     def request_broadcast(self):
@@ -258,10 +304,29 @@ class App:
         table.add_column("CPU °C", width=9, justify="right")
         table.add_column("Status", width=12)
 
-        rows = self.state.snapshot()
-        for node_id, hb, age, knob, temp, status, age_secs in rows:
-            style = "on grey15" if age_secs is not None and age_secs < 1 else ""
-            table.add_row(f"0x{node_id:08X}", hb, age, knob, temp, status, style=style)
+        rows = self.state.snapshot(time.time())
+        for node_id, *fields in rows:
+            # Age only ticks once per second; reuse the formatted cells until something changes
+            cached = self._row_cache.get(node_id)
+            if cached is None or cached[0] != fields:
+                hb, age_secs, knob, temp, status, subs_done, subs_total = fields
+                if status == STATUS_READY:
+                    status_str = "[green]Ready[/]"
+                elif status == STATUS_MOD:
+                    status_str = f"[yellow]Mod {subs_done}/{subs_total}[/]"
+                else:
+                    status_str = "[white]Seen[/]"
+                cells = (
+                    f"0x{node_id:08X}",
+                    hb.strftime('%H:%M:%S') if hb else "-",
+                    f"{age_secs:>3}s" if age_secs is not None else "-",
+                    f"{knob}" if knob is not None else "-",
+                    f"{temp:.2f}" if temp is not None else "-",
+                    status_str,
+                )
+                style = "on grey15" if age_secs is not None and age_secs < 1 else ""
+                cached = self._row_cache[node_id] = (fields, cells, style)
+            table.add_row(*cached[1], style=cached[2])
         return table
 
     def _build_layout(self):
@@ -269,7 +334,7 @@ class App:
         layout.split(
             Layout(Text(f" CAN Master | {self.iface} | {time.strftime('%H:%M:%S')} (q=quit, b=broadcast)", style="bold cyan"), size=1),
             Layout(self._build_table(), name="body"),
-            Layout(Panel(Text("\n".join(self.log.tail(self.log_height))), title="System Log", border_style="magenta"), size=self.log_height)
+            Layout(Panel(self.log.tail(self.log_height), title="System Log", border_style="magenta"), size=self.log_height)
         )
         return layout
 
@@ -277,9 +342,16 @@ class App:
         if self.is_windows:
             return self.msvcrt.getwch() if self.msvcrt and self.msvcrt.kbhit() else None
         else:
-            if not self.stdin_is_tty: return None
-            dr, _, _ = self.select.select([sys.stdin], [], [], 0)
-            return sys.stdin.read(1) if dr else None
+            if not self._key_buf:
+                if not self.stdin_is_tty: return None
+                dr, _, _ = self.select.select([sys.stdin], [], [], 0)
+                if not dr: return None
+                # One raw read drains everything typed so far; bypasses TextIO buffering
+                self._key_buf = os.read(sys.stdin.fileno(), 64)
+            # Hand out one key per call and keep the rest pending; escape sequences aren't bound here
+            key, self._key_buf = _next_key(self._key_buf)
+            if key[:1] == b'\x1b': return None
+            return key.decode(errors="ignore") or None
 
     def run(self):
         self.reader_thread.start()
@@ -293,7 +365,12 @@ class App:
 
         try:
             with Live(self._build_layout(), refresh_per_second=10, screen=True) as live:
+                next_draw = time.monotonic()
                 while not self.stop_event.is_set():
+                    # Sleep until a frame arrives or the next redraw is due, but not while typed keys are pending
+                    timeout = 0.0 if self._key_buf else max(0.0, next_draw - time.monotonic())
+                    if self._wake.wait(timeout=timeout):
+                        self._wake.clear()
                     self._process_queue()
                     key = self._read_key()
                     if key:
@@ -302,8 +379,10 @@ class App:
                         if key == '+': self.log_height += 1
                         if key == '-': self.log_height = max(5, self.log_height - 1)
 
-                    live.update(self._build_layout())
-                    time.sleep(0.05)
+                    now = time.monotonic()
+                    if now >= next_draw:
+                        live.update(self._build_layout())
+                        next_draw = now + UI_REFRESH_SECONDS
         finally:
             if not self.is_windows and self.stdin_is_tty:
                 self.termios.tcsetattr(sys.stdin, self.termios.TCSADRAIN, self.orig_term_attrs)
@@ -2,9 +2,10 @@
 import time
 import struct
 import threading
-import queue
+import select
 from collections import deque
-from datetime import datetime
+from itertools import islice
+from functools import lru_cache
 import platform
 import sys
 import argparse
@@ -32,23 +33,49 @@ KNOB_ID            = 0x518  # Telemetry: Knob
 TEMP_ID            = 0x51A  # Telemetry: Temp
 
 DEFAULT_CAN_INTERFACE = 'can0'
+READ_BATCH_MAX        = 32  # frames coalesced per reader -> UI handoff
+UI_REFRESH_SECONDS    = 0.1
 LOG_MAX_LINES         = 2000
 
+# Precompiled big-endian wire formats: [ID_32][value]
+_U32    = struct.Struct('>I').unpack_from
+_U16    = struct.Struct('>H').unpack_from
+_U32U32 = struct.Struct('>II').unpack_from
+_U32U16 = struct.Struct('>IH').unpack_from
+_U32F   = struct.Struct('>If').unpack_from
+_P32    = struct.Struct('>I').pack
+
 console = Console()
 
+@lru_cache(maxsize=128)
+def _fmt_hms(sec: int) -> str:
+    # Heartbeats repeat the same few seconds across nodes; format each one only once
+    return time.strftime('%H:%M:%S', time.localtime(sec))
+
 class LogBuffer:
     def __init__(self, max_lines=LOG_MAX_LINES):
         self.lines = deque(maxlen=max_lines)
         self.lock = threading.Lock()
+        self.seq = 0  # bumped per add; the deque length stops changing once it is full
+        self._last_sec = None
+        self._last_ts = ''
 
     def add(self, text: str):
-        ts = time.strftime('%H:%M:%S')
+        sec = int(time.time())
         with self.lock:
-            self.lines.append(f"[{ts}] {text}")
+            # Interview bursts log many lines per second; format the timestamp once per second
+            if sec != self._last_sec:
+                self._last_sec = sec
+                self._last_ts = time.strftime('%H:%M:%S', time.localtime(sec))
+            self.lines.append(f"[{self._last_ts}] {text}")
+            self.seq += 1
 
     def tail(self, n):
+        # Walk in from the right end so only n entries are visited, not the whole buffer
         with self.lock:
-            return list(self.lines)[-n:]
+            out = list(islice(reversed(self.lines), n))
+        out.reverse()
+        return out
 
     def write_to_file(self, path: str):
         with self.lock:
@@ -62,34 +89,36 @@ class LogBuffer:
 class CANState:
     def __init__(self):
         self.nodes = {}
-        self.lock = threading.Lock()
         self.last_sync = {}
-
-    def touch(self, node_id: int):
-        with self.lock:
-            nd = self.nodes.setdefault(node_id, {
-                'heartbeat': None, 
-                'knob': None, 
-                'temp': None, 
-                'last': None,
-                'sub_mod_cnt': 0,
-                'reported_crc': 0,
-                'subs': {}, # Index -> { 'cfg': bytes, 'telemetry': dict }
-                'interview_complete': False
-            })
-            nd['last'] = time.time()
-            return nd
-
-    def snapshot(self):
-        with self.lock:
-            ids = sorted(self.nodes.keys())
-            now = time.time()
-            data = []
-            for node_id in ids:
-                nd = self.nodes[node_id]
-                age_secs = int(now - nd['last']) if nd['last'] else None
-                
-                # Format sub-module summary strings
+        self.dirty = True  # set on any node update, cleared by the UI when it redraws the table
+
+    def touch(self, node_id: int, now: float):
+        nd = self.nodes.setdefault(node_id, {
+            'heartbeat_ts': None, # node's unix epoch seconds from its last EPOCH frame
+            'knob': None, 
+            'temp': None, 
+            'last': None,
+            'sub_mod_cnt': 0,
+            'reported_crc': 0,
+            'subs': {}, # Index -> { 'cfg': bytes, 'telemetry': dict }
+            'interview_complete': False,
+            '_subs_text': "",
+            '_subs_dirty': False  # set by the interview handler whenever 'subs' changes
+        })
+        nd['last'] = now
+        self.dirty = True
+        return nd
+
+    def snapshot(self, now: float):
+        # Raw values only; formatting happens in App._build_table.
+        # touch() and snapshot() both run on the UI thread (the reader only queues frames), so no lock is needed
+        rows = []
+        for node_id, nd in sorted(self.nodes.items()):
+            age_secs = int(now - nd['last']) if nd['last'] else None
+
+            # Sub-module summary only changes when interview frames arrive
+            if nd['_subs_dirty']:
+                nd['_subs_dirty'] = False
                 sub_summaries = []
                 for i in sorted(nd['subs'].keys()):
                     s = nd['subs'][i]
@@ -99,18 +128,11 @@ class CANState:
                         sub_summaries.append(f"M{i}[{cfg}|ID:0x{tele['id']:03X}|L:{tele['dlc']}]")
                     else:
                         sub_summaries.append(f"M{i}[{cfg}|...]")
+                nd['_subs_text'] = " ".join(sub_summaries)
 
-                data.append({
-                    'id': node_id,
-                    'hb': nd['heartbeat'].strftime('%H:%M:%S') if nd['heartbeat'] else "-",
-                    'age': age_secs,
-                    'knob': nd['knob'] if nd['knob'] is not None else "-",
-                    'temp': nd['temp'] if nd['temp'] is not None else "-",
-                    'complete': nd['interview_complete'],
-                    'cnt': nd['sub_mod_cnt'],
-                    'subs_text': " ".join(sub_summaries)
-                })
-            return data
+            rows.append((node_id, nd['heartbeat_ts'], age_secs, nd['knob'], nd['temp'],
+                         nd['interview_complete'], nd['_subs_text']))
+        return rows
 
 class App:
     def __init__(self, bus, iface: str, dry_run: bool = False, debug_file: str | None = None):
@@ -120,95 +142,159 @@ class App:
         self.debug_file = debug_file
         self.log = LogBuffer()
         self.state = CANState()
-        self.q = queue.Queue()
+        self.q = deque()  # reader -> UI handoff of frame lists; append/popleft are atomic, one producer, one consumer
+        self._wake = threading.Event()  # set by the reader whenever a batch is queued
         self.stop_event = threading.Event()
         self.reader_thread = threading.Thread(target=self._reader_loop, daemon=True)
         self.log_height = 10
+        # Fixed-ID frame handlers; the interview range is checked separately
+        self._handlers = {
+            EPOCH_ID: self._on_epoch,
+            KNOB_ID: self._on_knob,
+            TEMP_ID: self._on_temp,
+        }
         self.is_windows = (platform.system().lower() == "windows")
         self.stdin_is_tty = sys.stdin.isatty()
 
+        # Layout skeleton is built once; only the parts whose inputs changed get updated
+        self._header = Layout(size=1)
+        self._body = Layout(name="body")
+        self._log_panel = Layout(size=self.log_height)
+        self._root_layout = Layout()
+        self._root_layout.split(self._header, self._body, self._log_panel)
+        self._drawn_sec = None
+        self._drawn_log_seq = None
+
     def _reader_loop(self):
+        # SocketCAN exposes its socket; block on it so the thread only wakes when a frame lands
+        try:
+            fd = self.bus.fileno()
+        except (AttributeError, NotImplementedError):
+            fd = -1
+        if fd < 0:
+            return self._poll_reader_loop()
+
+        while not self.stop_event.is_set():
+            try:
+                ready, _, _ = select.select([fd], [], [], 1.0)
+                if not ready: continue
+                msg = self.bus.recv(timeout=0)
+                if msg: self._queue_batch(msg)
+            except Exception:
+                time.sleep(0.1)
+
+    def _poll_reader_loop(self):
+        # Interfaces without a pollable fd (virtual, serial adapters) fall back to timed recv
         while not self.stop_event.is_set():
             try:
                 msg = self.bus.recv(timeout=0.2)
-                if msg: self.q.put(msg)
+                if msg: self._queue_batch(msg)
             except Exception:
                 time.sleep(0.1)
 
+    def _queue_batch(self, msg):
+        # Pick up whatever else is already waiting so a burst crosses to the UI thread as one list
+        batch = [msg]
+        recv = self.bus.recv
+        while len(batch) < READ_BATCH_MAX:
+            msg = recv(timeout=0)
+            if msg is None: break
+            batch.append(msg)
+        self.q.append(batch)
+        self._wake.set()
+
     def _process_queue(self):
-        while True:
-            try:
-                msg = self.q.get_nowait()
-            except queue.Empty:
-                break
-
-            arb_id = msg.arbitration_id
-            dlc = len(msg.data)
-
-            # Heartbeat & Telemetry
-            if arb_id == EPOCH_ID and dlc >= 8:
-                node_id, unix_ts = struct.unpack('>II', msg.data[:8])
-                self.state.touch(node_id)['heartbeat'] = datetime.fromtimestamp(unix_ts)
-            elif arb_id == KNOB_ID and dlc >= 6:
-                node_id, val = struct.unpack('>IH', msg.data[:6])
-                self.state.touch(node_id)['knob'] = val
-            elif arb_id == TEMP_ID and dlc >= 8:
-                node_id, celsius = struct.unpack('>If', msg.data[:8])
-                self.state.touch(node_id)['temp'] = celsius
-
-            # Interview Logic (0x700 - 0x7FF)
-            elif 0x700 <= arb_id <= 0x7FF:
-                if dlc < 4: continue # Length Guard
+        # Single consumer: pop only what was queued when we started; the reader may keep appending
+        q = self.q
+        batches = [q.popleft() for _ in range(len(q))]
+
+        # One clock read per pass; every frame drained here is stamped with it
+        now = time.time()
+        get_handler = self._handlers.get
+        on_interview = self._on_interview
+        view = memoryview
+        for batch in batches:
+            for msg in batch:
+                arb_id = msg.arbitration_id
+                # Handlers read through a view so payload slices don't copy
+                mv = view(msg.data)
+                handler = get_handler(arb_id)
+                if handler:
+                    handler(mv, now)
+                elif 0x700 <= arb_id <= 0x7FF:
+                    on_interview(arb_id, mv, now)
+
+    # Heartbeat & Telemetry
+    def _on_epoch(self, data, now):
+        if len(data) >= 8:
+            node_id, unix_ts = _U32U32(data, 0)
+            self.state.touch(node_id, now)['heartbeat_ts'] = unix_ts
+
+    def _on_knob(self, data, now):
+        if len(data) >= 6:
+            node_id, val = _U32U16(data, 0)
+            self.state.touch(node_id, now)['knob'] = val
+
+    def _on_temp(self, data, now):
+        if len(data) >= 8:
+            node_id, celsius = _U32F(data, 0)
+            self.state.touch(node_id, now)['temp'] = celsius
+
+    # Interview Logic (0x700 - 0x7FF)
+    def _on_interview(self, arb_id, data, now):
+        dlc = len(data)
+        if dlc < 4: return # Length Guard
+        
+        node_id = _U32(data, 0)[0]
+        node = self.state.touch(node_id, now) 
+
+        # If already interviewed, do not trigger ACK sequence again
+        if node['interview_complete']:
+            return
+
+        # Process Introduction Frame
+        # Identify msgPtr 0: Contains SubMod count and CRC
+        if node['sub_mod_cnt'] == 0:
+            if dlc >= 7:
+                node['sub_mod_cnt'] = data[4]
+                node['reported_crc'] = _U16(data, 5)[0]
+                self.log.add(f"NEW NODE: 0x{node_id:08X} (Type:0x{arb_id:X})")
+            else:
+                return # Malformed identity frame
+        else:
+            # Sub-module data frames
+            if dlc >= 5:
+                mod_idx_byte = data[4]
+                mod_idx = mod_idx_byte & 0x7F
+                is_part_b = bool(mod_idx_byte & 0x80)
                 
-                node_id = struct.unpack('>I', msg.data[0:4])[0]
-                node = self.state.touch(node_id) 
-
-                # If already interviewed, do not trigger ACK sequence again
-                if node['interview_complete']:
-                    continue
-
-                # Process Introduction Frame
-                # Identify msgPtr 0: Contains SubMod count and CRC
-                if node['sub_mod_cnt'] == 0:
-                    if dlc >= 7:
-                        node['sub_mod_cnt'] = msg.data[4]
-                        node['reported_crc'] = (msg.data[5] << 8) | msg.data[6]
-                        self.log.add(f"NEW NODE: 0x{node_id:08X} (Type:0x{arb_id:X})")
-                    else:
-                        continue # Malformed identity frame
-                else:
-                    # Sub-module data frames
-                    if dlc >= 5:
-                        mod_idx_byte = msg.data[4]
-                        mod_idx = mod_idx_byte & 0x7F
-                        is_part_b = bool(mod_idx_byte & 0x80)
-                        
-                        if mod_idx not in node['subs']:
-                            node['subs'][mod_idx] = {'cfg': None, 'telemetry': None}
-                        
-                        if not is_part_b and dlc >= 8:
-                            # Part A: Raw Config bytes
-                            node['subs'][mod_idx]['cfg'] = msg.data[5:8]
-                        elif is_part_b and dlc >= 8:
-                            # Part B: DataMsgID, DLC, and SaveState
-                            data_id = (msg.data[5] << 8) | msg.data[6]
-                            data_dlc = msg.data[7] & 0x0F
-                            save = bool(msg.data[7] & 0x80)
-                            node['subs'][mod_idx]['telemetry'] = {'id': data_id, 'dlc': data_dlc, 'save': save}
-                            
-                            # Completion check
-                            if (mod_idx + 1) >= node['sub_mod_cnt']:
-                                node['interview_complete'] = True
-                                self.log.add(f"INTERVIEW DONE: 0x{node_id:08X}")
-                    else:
-                        continue
+                if mod_idx not in node['subs']:
+                    node['subs'][mod_idx] = {'cfg': None, 'telemetry': None}
+                node['_subs_dirty'] = True
+                
+                if not is_part_b and dlc >= 8:
+                    # Part A: Raw Config bytes
+                    node['subs'][mod_idx]['cfg'] = data[5:8].tobytes()
+                elif is_part_b and dlc >= 8:
+                    # Part B: DataMsgID, DLC, and SaveState
+                    data_id = _U16(data, 5)[0]
+                    data_dlc = data[7] & 0x0F
+                    save = bool(data[7] & 0x80)
+                    node['subs'][mod_idx]['telemetry'] = {'id': data_id, 'dlc': data_dlc, 'save': save}
+                    
+                    # Completion check
+                    if (mod_idx + 1) >= node['sub_mod_cnt']:
+                        node['interview_complete'] = True
+                        self.log.add(f"INTERVIEW DONE: 0x{node_id:08X}")
+            else:
+                return
 
-                # Trigger the next packet in the node's sequence
-                self._send_ack(node_id)
+        # Trigger the next packet in the node's sequence
+        self._send_ack(node_id)
 
     def _send_ack(self, node_id: int):
         if self.dry_run: return
-        payload = struct.pack('>I', node_id)
+        payload = _P32(node_id)
         msg = can.Message(arbitration_id=ACK_INTRO_ID, data=payload, is_extended_id=False)
         try:
             self.bus.send(msg)
@@ -230,28 +316,32 @@ class App:
         table.add_column("Temp", width=7, justify="right")
         table.add_column("Interview Details (SubModules)", ratio=1)
 
-        for n in self.state.snapshot():
-            age_style = "green" if n['age'] < 10 else "yellow" if n['age'] < 30 else "red"
-            status_prefix = "[green]✓[/] " if n['complete'] else "[yellow]⋯[/] "
+        for node_id, hb, age, knob, temp, complete, subs_text in self.state.snapshot(time.time()):
+            age_style = "green" if age < 10 else "yellow" if age < 30 else "red"
+            status_prefix = "[green]✓[/] " if complete else "[yellow]⋯[/] "
             
             table.add_row(
-                f"0x{n['id']:08X}",
-                n['hb'],
-                Text(str(n['age']) + "s", style=age_style),
-                str(n['knob']),
-                f"{n['temp']:.1f}" if isinstance(n['temp'], float) else "-",
-                status_prefix + n['subs_text']
+                f"0x{node_id:08X}",
+                _fmt_hms(hb) if hb is not None else "-",
+                Text(str(age) + "s", style=age_style),
+                str(knob) if knob is not None else "-",
+                f"{temp:.1f}" if isinstance(temp, float) else "-",
+                status_prefix + subs_text
             )
         return table
 
-    def _build_layout(self):
-        layout = Layout()
-        layout.split(
-            Layout(Text(f" CAN Master | {self.iface} | {time.strftime('%H:%M:%S')} | (q)uit (b)roadcast", style="bold reverse cyan"), size=1),
-            Layout(self._build_table(), name="body"),
-            Layout(Panel(Text("\n".join(self.log.tail(self.log_height))), title="System Log", border_style="magenta"), size=self.log_height)
-        )
-        return layout
+    def _refresh_layout(self):
+        # Age column and header clock tick once per second even on an idle bus
+        sec = int(time.time())
+        if self.state.dirty or sec != self._drawn_sec:
+            self.state.dirty = False
+            self._drawn_sec = sec
+            self._header.update(Text(f" CAN Master | {self.iface} | {time.strftime('%H:%M:%S', time.localtime(sec))} | (q)uit (b)roadcast", style="bold reverse cyan"))
+            self._body.update(self._build_table())
+        if self.log.seq != self._drawn_log_seq:
+            self._drawn_log_seq = self.log.seq
+            self._log_panel.update(Panel(Text("\n".join(self.log.tail(self.log_height))), title="System Log", border_style="magenta"))
+        return self._root_layout
 
     def run(self):
         self.reader_thread.start()
@@ -264,8 +354,13 @@ class App:
             tty.setcbreak(sys.stdin.fileno())
 
         try:
-            with Live(self._build_layout(), refresh_per_second=10, screen=True) as live:
+            self._refresh_layout()
+            with Live(self._root_layout, refresh_per_second=10, screen=True):
+                next_draw = time.monotonic() + UI_REFRESH_SECONDS
                 while not self.stop_event.is_set():
+                    # Sleep until a batch arrives or the next redraw is due; batches are drained on every wake
+                    if self._wake.wait(timeout=max(0.0, next_draw - time.monotonic())):
+                        self._wake.clear()
                     self._process_queue()
                     
                     # Manual keyboard check
@@ -273,15 +368,16 @@ class App:
                     if self.is_windows and msvcrt.kbhit():
                         key = msvcrt.getwch().lower()
                     elif not self.is_windows and self.stdin_is_tty:
-                        import select
                         dr, _, _ = select.select([sys.stdin], [], [], 0)
                         if dr: key = sys.stdin.read(1).lower()
                     
                     if key == 'q': self.stop_event.set()
                     if key == 'b': self.request_broadcast()
                     
-                    live.update(self._build_layout())
-                    time.sleep(0.05)
+                    now = time.monotonic()
+                    if now >= next_draw:
+                        next_draw = now + UI_REFRESH_SECONDS
+                        self._refresh_layout()
         finally:
             if not self.is_windows and self.stdin_is_tty:
                 import termios
@@ -1,9 +1,11 @@
 #!/usr/bin/env python3
 import time
+import binascii
 import struct
 import threading
-import queue
+import select
 from collections import deque
+from itertools import islice
 from datetime import datetime
 import platform
 import sys
@@ -31,41 +33,59 @@ KNOB_ID            = 0x518  # Telemetry: Knob
 TEMP_ID            = 0x51A  # Telemetry: Temp
 
 DEFAULT_CAN_INTERFACE = 'can0'
+READ_BATCH_MAX        = 32  # frames coalesced per reader -> UI handoff
+UI_REFRESH_SECONDS    = 0.1
 LOG_MAX_LINES         = 2000
 
+# Precompiled big-endian wire formats: [ID_32][value]
+_U32    = struct.Struct('>I').unpack_from
+_U16    = struct.Struct('>H').unpack_from
+_U32U16 = struct.Struct('>IH').unpack_from
+_U32F   = struct.Struct('>If').unpack_from
+_P32    = struct.Struct('>I').pack
+
 # Constants for struct reconstruction
 SUBMODULE_STRUCT_SIZE = 16  # Matches ESP32 sizeof(subModule_t) including tail padding
 NODEINFO_STRUCT_SIZE  = 136 # Matches ESP32 sizeof(nodeInfo_t) (16*8 + 8 metadata)
 
+# subModule_t, little endian as laid out in ESP32 RAM:
+# rawConfig[3], reserved, data union[4], introMsgId, dataMsgId, introMsgDLC, dataMsgDLC, saveState, pad
+_SUB_STRUCT = struct.Struct('<3s5xHHBBBx')
+# nodeInfo_t tail: nodeID, nodeTypeMsg, nodeTypeDLC, subModCnt
+_HDR_STRUCT = struct.Struct('<IHBB')
+_ZERO_NODEINFO = bytes(NODEINFO_STRUCT_SIZE)
+
 console = Console()
 
 def crc16_ccitt(data: bytes):
     # Standard CRC-16-CCITT (0x1021) matching ESP32 rom/crc.h crc16_be.
-    # Initial: 0xFFFF, Poly: 0x1021
-    crc = 0xFFFF
-    for byte in data:
-        crc ^= (byte << 8)
-        for _ in range(8):
-            if crc & 0x8000:
-                crc = (crc << 1) ^ 0x1021
-            else:
-                crc <<= 1
-            crc &= 0xFFFF
-    return crc
+    # Initial: 0xFFFF, Poly: 0x1021. binascii.crc_hqx is the same CRC implemented in C.
+    return binascii.crc_hqx(data, 0xFFFF)
 
 class LogBuffer:
     def __init__(self, max_lines=LOG_MAX_LINES):
         self.lines = deque(maxlen=max_lines)
         self.lock = threading.Lock()
+        self.seq = 0  # bumped per add; the deque length stops changing once it is full
+        self._last_sec = None
+        self._last_ts = ''
 
     def add(self, text: str):
-        ts = time.strftime('%H:%M:%S')
+        sec = int(time.time())
         with self.lock:
-            self.lines.append(f"[{ts}] {text}")
+            # Interview bursts log many lines per second; format the timestamp once per second
+            if sec != self._last_sec:
+                self._last_sec = sec
+                self._last_ts = time.strftime('%H:%M:%S', time.localtime(sec))
+            self.lines.append(f"[{self._last_ts}] {text}")
+            self.seq += 1
 
     def tail(self, n):
+        # Walk in from the right end so only n entries are visited, not the whole buffer
         with self.lock:
-            return list(self.lines)[-n:]
+            out = list(islice(reversed(self.lines), n))
+        out.reverse()
+        return out
 
     def write_to_file(self, path: str):
         with self.lock:
@@ -79,173 +99,199 @@ class LogBuffer:
 class CANState:
     def __init__(self):
         self.nodes = {}
-        self.lock = threading.Lock()
-
-    def touch(self, node_id: int):
-        with self.lock:
-            nd = self.nodes.setdefault(node_id, {
-                'heartbeat': None, 'knob': None, 'temp': None, 'last': None,
-                'node_type_msg': 0, 'sub_mod_cnt': 0, 'reported_crc': 0,
-                'subs': {}, 'interview_complete': False, 'calculated_crc': 0,
-                'mem_size': 0
-            })
-            nd['last'] = time.time()
-            return nd
+        self.dirty = True  # set on any node update, cleared by the UI when it redraws the table
+        self._crc_buf = bytearray(NODEINFO_STRUCT_SIZE)  # scratch nodeInfo_t image, UI thread only
+
+    def touch(self, node_id: int, now: float):
+        nd = self.nodes.setdefault(node_id, {
+            'heartbeat': None, 'knob': None, 'temp': None, 'last': None,
+            'node_type_msg': 0, 'sub_mod_cnt': 0, 'reported_crc': 0,
+            'subs': {}, 'interview_complete': False, 'calculated_crc': 0,
+            'mem_size': 0
+        })
+        nd['last'] = now
+        self.dirty = True
+        return nd
 
     def calculate_node_crc(self, node_id: int):
         # Reconstructs the nodeInfo_t structure (136 bytes total).
         # subModule_t: 16 bytes (15 data + 1 padding)
         # node metadata: 8 bytes
         nd = self.nodes[node_id]
-        buf = bytearray(NODEINFO_STRUCT_SIZE) 
+        buf = self._crc_buf
+        buf[:] = _ZERO_NODEINFO  # same length, so this is an in-place clear
         
-        # 1. Pack 8 subModules (16 bytes each)
-        for i in range(8):
-            offset = i * SUBMODULE_STRUCT_SIZE
-            if i in nd['subs']:
-                s = nd['subs'][i]
-                
-                # [0:3] config.rawConfig
-                if s['cfg']:
-                    buf[offset:offset+3] = s['cfg']
-                
-                # [3] explicit reserved byte
-                buf[offset+3] = 0x00
-                
-                # [4:8] data union (4 bytes) - assumed 0 during initialization/CRC
-                # [8:10] introMsgId (Little Endian for ESP32 RAM)
-                struct.pack_into('<H', buf, offset + 8, s['intro_id'])
-                
-                # [10:12] dataMsgId
-                if s['telemetry']:
-                    struct.pack_into('<H', buf, offset + 10, s['telemetry']['id'])
-                    # [12] introMsgDLC (Assuming 8 per node defaults)
-                    buf[offset + 12] = 8 
-                    # [13] dataMsgDLC
-                    buf[offset + 13] = s['telemetry']['dlc']
-                    # [14] saveState
-                    buf[offset + 14] = 1 if s['telemetry']['save'] else 0
-                
-                # [15] Tail padding byte to align next struct on 16-bit boundary
-                buf[offset + 15] = 0x00
-
-        # 2. Pack Node Metadata at end of struct (starts at byte 128)
-        # uint32_t nodeID
-        struct.pack_into('<I', buf, 128, node_id)
-        # uint16_t nodeTypeMsg
-        struct.pack_into('<H', buf, 132, nd['node_type_msg'])
-        # uint8_t nodeTypeDLC
-        buf[134] = 8 # Default DLC for introduction frames
-        # uint8_t subModCnt
-        buf[135] = nd['sub_mod_cnt']
+        # 1. Pack 8 subModules (16 bytes each); absent ones stay zeroed
+        pack_sub = _SUB_STRUCT.pack_into
+        for i, s in nd['subs'].items():
+            if i >= 8: continue
+            tele = s['telemetry']
+            if tele:
+                # introMsgDLC is assumed to be 8 on every node
+                pack_sub(buf, i * SUBMODULE_STRUCT_SIZE, s['cfg'] or b'', s['intro_id'],
+                         tele['id'], 8, tele['dlc'], 1 if tele['save'] else 0)
+            else:
+                pack_sub(buf, i * SUBMODULE_STRUCT_SIZE, s['cfg'] or b'', s['intro_id'], 0, 0, 0, 0)
+
+        # 2. Pack Node Metadata at end of struct (starts at byte 128); nodeTypeDLC defaults to 8
+        _HDR_STRUCT.pack_into(buf, 128, node_id, nd['node_type_msg'], 8, nd['sub_mod_cnt'])
         
         nd['mem_size'] = len(buf)
         return crc16_ccitt(buf)
 
-    def snapshot(self):
-        with self.lock:
-            ids = sorted(self.nodes.keys())
-            now = time.time()
-            data = []
-            for node_id in ids:
-                nd = self.nodes[node_id]
-                age = int(now - nd['last']) if nd['last'] else 0
-                
-                crc_status = ""
-                if nd['interview_complete']:
-                    size_info = f"({nd['mem_size']} bytes)"
-                    if nd['calculated_crc'] == nd['reported_crc']:
-                        crc_status = f"[green]MATCH 0x{nd['calculated_crc']:04X} {size_info}[/]"
-                    else:
-                        crc_status = f"[red]FAIL C:0x{nd['calculated_crc']:04X} R:0x{nd['reported_crc']:04X} {size_info}[/]"
-
-                data.append({
-                    'id': node_id,
-                    'hb': nd['heartbeat'].strftime('%H:%M:%S') if nd['heartbeat'] else "-",
-                    'age': age,
-                    'knob': nd['knob'] if nd['knob'] is not None else "-",
-                    'temp': nd['temp'] if nd['temp'] is not None else "-",
-                    'complete': nd['interview_complete'],
-                    'crc_str': crc_status,
-                    'subs_text': f"{len(nd['subs'])}/{nd['sub_mod_cnt']} mods"
-                })
-            return data
+    def snapshot(self, now: float):
+        # Raw values only; formatting happens in App._build_table.
+        # touch() and snapshot() both run on the UI thread (the reader only queues frames), so no lock is needed
+        rows = []
+        for node_id, nd in sorted(self.nodes.items()):
+            age = int(now - nd['last']) if nd['last'] else 0
+            rows.append((node_id, age, nd['knob'], nd['temp'], nd['interview_complete'],
+                         nd['calculated_crc'], nd['reported_crc'], nd['mem_size'],
+                         len(nd['subs']), nd['sub_mod_cnt']))
+        return rows
 
 class App:
     def __init__(self, bus, iface):
         self.bus = bus
         self.iface = iface
         self.state = CANState()
-        self.q = queue.Queue()
+        self.q = deque()  # reader -> UI handoff of frame lists; append/popleft are atomic, one producer, one consumer
+        self._wake = threading.Event()  # set by the reader whenever a batch is queued
         self.log = LogBuffer()
         self.stop_event = threading.Event()
         self.reader_thread = threading.Thread(target=self._reader_loop, daemon=True)
         self.is_windows = (platform.system().lower() == "windows")
+        # Fixed-ID frame handlers; the interview range is checked separately
+        self._handlers = {
+            KNOB_ID: self._on_knob,
+            TEMP_ID: self._on_temp,
+        }
+
+        # Layout skeleton is built once; only the parts whose inputs changed get updated
+        self._body = Layout(name="body")
+        self._log_panel = Layout(size=10)
+        self._root_layout = Layout()
+        self._root_layout.split(
+            Layout(Text(f" CAN Master | {self.iface} | (q)uit (b)roadcast", style="bold reverse cyan"), size=1),
+            self._body,
+            self._log_panel
+        )
+        self._drawn_sec = None
+        self._drawn_log_seq = None
 
     def _reader_loop(self):
+        # SocketCAN exposes its socket; block on it so the thread only wakes when a frame lands
+        try:
+            fd = self.bus.fileno()
+        except (AttributeError, NotImplementedError):
+            fd = -1
+        if fd < 0:
+            return self._poll_reader_loop()
+
+        while not self.stop_event.is_set():
+            try:
+                ready, _, _ = select.select([fd], [], [], 1.0)
+                if not ready: continue
+                msg = self.bus.recv(timeout=0)
+                if msg: self._queue_batch(msg)
+            except Exception:
+                time.sleep(0.1)
+
+    def _poll_reader_loop(self):
+        # Interfaces without a pollable fd (virtual, serial adapters) fall back to timed recv
         while not self.stop_event.is_set():
             try:
                 msg = self.bus.recv(timeout=0.1)
-                if msg: self.q.put(msg)
+                if msg: self._queue_batch(msg)
             except Exception: pass
 
+    def _queue_batch(self, msg):
+        # Pick up whatever else is already waiting so a burst crosses to the UI thread as one list
+        batch = [msg]
+        recv = self.bus.recv
+        while len(batch) < READ_BATCH_MAX:
+            msg = recv(timeout=0)
+            if msg is None: break
+            batch.append(msg)
+        self.q.append(batch)
+        self._wake.set()
+
     def _process_queue(self):
-        while not self.q.empty():
-            msg = self.q.get_nowait()
-            arb_id = msg.arbitration_id
-            dlc = len(msg.data)
-
-            # Telemetry Parsing
-            if arb_id == KNOB_ID and dlc >= 6:
-                node_id, val = struct.unpack('>IH', msg.data[:6])
-                self.state.touch(node_id)['knob'] = val
-            elif arb_id == TEMP_ID and dlc >= 8:
-                node_id, celsius = struct.unpack('>If', msg.data[:8])
-                self.state.touch(node_id)['temp'] = celsius
-
-            # Interview Sequence (0x700-0x7FF)
-            elif 0x700 <= arb_id <= 0x7FF:
-                if dlc < 4: continue
-                node_id = struct.unpack('>I', msg.data[0:4])[0]
-                node = self.state.touch(node_id)
-
-                if node['interview_complete']:
-                    continue 
-
-                # Case 1: Identity Frame (msgPtr 0)
-                if node['sub_mod_cnt'] == 0:
-                    if dlc >= 7:
-                        node['node_type_msg'] = arb_id
-                        node['sub_mod_cnt'] = msg.data[4]
-                        node['reported_crc'] = (msg.data[5] << 8) | msg.data[6]
-                        self.log.add(f"Detected Node 0x{node_id:08X}")
-                    else: continue
-                # Case 2: Sub-module Frames (msgPtr > 0)
-                else:
-                    if dlc >= 5:
-                        m_byte = msg.data[4]
-                        idx, is_b = m_byte & 0x7F, bool(m_byte & 0x80)
-                        
-                        if idx not in node['subs']:
-                            node['subs'][idx] = {'cfg': None, 'telemetry': None, 'intro_id': arb_id}
-                        
-                        if not is_b and dlc >= 8: # Part A: Config
-                            node['subs'][idx]['cfg'] = bytes(msg.data[5:8])
-                        elif is_b and dlc >= 8:   # Part B: Telemetry
-                            node['subs'][idx]['telemetry'] = {
-                                'id': (msg.data[5] << 8) | msg.data[6],
-                                'dlc': msg.data[7] & 0x0F,
-                                'save': bool(msg.data[7] & 0x80)
-                            }
-                            if (idx + 1) >= node['sub_mod_cnt']:
-                                node['interview_complete'] = True
-                                node['calculated_crc'] = self.state.calculate_node_crc(node_id)
-                                self.log.add(f"Verified 0x{node_id:08X} ({node['mem_size']} bytes)")
+        # Single consumer: pop only what was queued when we started; the reader may keep appending
+        q = self.q
+        batches = [q.popleft() for _ in range(len(q))]
+
+        # One clock read per pass; every frame drained here is stamped with it
+        now = time.time()
+        get_handler = self._handlers.get
+        on_interview = self._on_interview
+        view = memoryview
+        for batch in batches:
+            for msg in batch:
+                arb_id = msg.arbitration_id
+                # Handlers read through a view so payload slices don't copy
+                mv = view(msg.data)
+                handler = get_handler(arb_id)
+                if handler:
+                    handler(mv, now)
+                elif 0x700 <= arb_id <= 0x7FF:
+                    on_interview(arb_id, mv, now)
+
+    # Telemetry Parsing
+    def _on_knob(self, data, now):
+        if len(data) >= 6:
+            node_id, val = _U32U16(data, 0)
+            self.state.touch(node_id, now)['knob'] = val
+
+    def _on_temp(self, data, now):
+        if len(data) >= 8:
+            node_id, celsius = _U32F(data, 0)
+            self.state.touch(node_id, now)['temp'] = celsius
+
+    # Interview Sequence (0x700-0x7FF)
+    def _on_interview(self, arb_id, data, now):
+        dlc = len(data)
+        if dlc < 4: return
+        node_id = _U32(data, 0)[0]
+        node = self.state.touch(node_id, now)
+
+        if node['interview_complete']:
+            return 
+
+        # Case 1: Identity Frame (msgPtr 0)
+        if node['sub_mod_cnt'] == 0:
+            if dlc >= 7:
+                node['node_type_msg'] = arb_id
+                node['sub_mod_cnt'] = data[4]
+                node['reported_crc'] = _U16(data, 5)[0]
+                self.log.add(f"Detected Node 0x{node_id:08X}")
+            else: return
+        # Case 2: Sub-module Frames (msgPtr > 0)
+        else:
+            if dlc >= 5:
+                m_byte = data[4]
+                idx, is_b = m_byte & 0x7F, bool(m_byte & 0x80)
                 
-                self._send_ack(node_id)
+                if idx not in node['subs']:
+                    node['subs'][idx] = {'cfg': None, 'telemetry': None, 'intro_id': arb_id}
+                
+                if not is_b and dlc >= 8: # Part A: Config
+                    node['subs'][idx]['cfg'] = data[5:8].tobytes()
+                elif is_b and dlc >= 8:   # Part B: Telemetry
+                    node['subs'][idx]['telemetry'] = {
+                        'id': _U16(data, 5)[0],
+                        'dlc': data[7] & 0x0F,
+                        'save': bool(data[7] & 0x80)
+                    }
+                    if (idx + 1) >= node['sub_mod_cnt']:
+                        node['interview_complete'] = True
+                        node['calculated_crc'] = self.state.calculate_node_crc(node_id)
+                        self.log.add(f"Verified 0x{node_id:08X} ({node['mem_size']} bytes)")
+        
+        self._send_ack(node_id)
 
     def _send_ack(self, node_id):
-        payload = struct.pack('>I', node_id)
+        payload = _P32(node_id)
         msg = can.Message(arbitration_id=ACK_INTRO_ID, data=payload, is_extended_id=False)
         try: self.bus.send(msg)
         except Exception: pass
@@ -255,8 +301,7 @@ class App:
         self.bus.send(msg)
         self.log.add("Discovery Requested (0x401)")
 
-    def _build_layout(self):
-        layout = Layout()
+    def _build_table(self):
         table = Table(show_header=True, header_style="bold cyan", expand=True)
         table.add_column("Node ID", width=12)
         table.add_column("Age", width=5, justify="right")
@@ -265,19 +310,32 @@ class App:
         table.add_column("Interview", width=12)
         table.add_column("CRC Verification", ratio=1)
 
-        for n in self.state.snapshot():
+        for node_id, age, knob, temp, complete, calc_crc, rep_crc, mem_size, subs, cnt in self.state.snapshot(time.time()):
+            crc_status = ""
+            if complete:
+                size_info = f"({mem_size} bytes)"
+                if calc_crc == rep_crc:
+                    crc_status = f"[green]MATCH 0x{calc_crc:04X} {size_info}[/]"
+                else:
+                    crc_status = f"[red]FAIL C:0x{calc_crc:04X} R:0x{rep_crc:04X} {size_info}[/]"
             table.add_row(
-                f"0x{n['id']:08X}", f"{n['age']}s", str(n['knob']), 
-                f"{n['temp']:.1f}" if isinstance(n['temp'], float) else "-",
-                n['subs_text'], n['crc_str']
+                f"0x{node_id:08X}", f"{age}s", str(knob) if knob is not None else "-",
+                f"{temp:.1f}" if isinstance(temp, float) else "-",
+                f"{subs}/{cnt} mods", crc_status
             )
-
-        layout.split(
-            Layout(Text(f" CAN Master | {self.iface} | (q)uit (b)roadcast", style="bold reverse cyan"), size=1),
-            Layout(table, name="body"),
-            Layout(Panel(Text("\n".join(self.log.tail(8))), title="System Log", border_style="magenta"), size=10)
-        )
-        return layout
+        return table
+
+    def _refresh_layout(self):
+        # Age column ticks once per second even on an idle bus
+        sec = int(time.time())
+        if self.state.dirty or sec != self._drawn_sec:
+            self.state.dirty = False
+            self._drawn_sec = sec
+            self._body.update(self._build_table())
+        if self.log.seq != self._drawn_log_seq:
+            self._drawn_log_seq = self.log.seq
+            self._log_panel.update(Panel(Text("\n".join(self.log.tail(8))), title="System Log", border_style="magenta"))
+        return self._root_layout
 
     def run(self):
         self.reader_thread.start()
@@ -290,14 +348,21 @@ class App:
             tty.setcbreak(sys.stdin.fileno())
         
         try:
-            with Live(self._build_layout(), refresh_per_second=10, screen=True) as live:
+            self._refresh_layout()
+            with Live(self._root_layout, refresh_per_second=10, screen=True):
+                next_draw = time.monotonic() + UI_REFRESH_SECONDS
                 while not self.stop_event.is_set():
+                    # Sleep until a batch arrives or the next redraw is due; batches are drained on every wake
+                    if self._wake.wait(timeout=max(0.0, next_draw - time.monotonic())):
+                        self._wake.clear()
                     self._process_queue()
                     key = self._get_key()
                     if key == 'q': self.stop_event.set()
                     if key == 'b': self.request_broadcast()
-                    live.update(self._build_layout())
-                    time.sleep(0.05)
+                    now = time.monotonic()
+                    if now >= next_draw:
+                        next_draw = now + UI_REFRESH_SECONDS
+                        self._refresh_layout()
         finally:
             if not self.is_windows and sys.stdin.isatty():
                 termios.tcsetattr(sys.stdin, termios.TCSADRAIN, orig_settings)
@@ -307,7 +372,6 @@ class App:
             import msvcrt
             return msvcrt.getwch().lower() if msvcrt.kbhit() else None
         else:
-            import select
             dr, _, _ = select.select([sys.stdin], [], [], 0)
             return sys.stdin.read(1).lower() if dr else None
 
@@ -1,9 +1,11 @@
 #!/usr/bin/env python3
 import time
+import asyncio
+import binascii
 import struct
 import threading
-import queue
 from collections import deque
+from itertools import islice
 import platform
 import sys
 import argparse
@@ -30,97 +32,137 @@ TEMP_ID            = 0x51A
 
 DEFAULT_CAN_INTERFACE = 'can0'
 LOG_MAX_LINES         = 2000
+RX_RING_SIZE          = 1024  # frames buffered between reader thread and UI
+UI_REFRESH_SECONDS    = 0.1
+
+# Precompiled big-endian wire formats: [ID_32][value]
+_U32    = struct.Struct('>I').unpack_from
+_U16    = struct.Struct('>H').unpack_from
+_U32U16 = struct.Struct('>IH').unpack_from
+_U32F   = struct.Struct('>If').unpack_from
+_P32    = struct.Struct('>I').pack
 
 SUBMODULE_STRUCT_SIZE = 16  
 NODEINFO_STRUCT_SIZE  = 136 
 
+# subModule_t as seen in the ESP32 serial dump: cfg[3], 6 pad/data bytes,
+# introMsgId @9, dataMsgId @11, introMsgDLC @13, dataMsgDLC @14, saveState @15 (little endian)
+_SUB_FMT = '3s6xHHBBB'
+# Whole nodeInfo_t: 8 subModule_t then nodeID, nodeTypeMsg, nodeTypeDLC, subModCnt at 0x80
+_META_STRUCT = struct.Struct('<IHBB')
+_EMPTY_SUB = (b'', 0, 0, 0, 0, 0)  # unused slot below the highest populated one: all zero
+
+# Most nodes only fill the first few slots. Keyed by populated slot count k:
+# (pack for the first k subModule_t, constant zero bytes for the remaining 8-k)
+_packer_by_count = {}
+
+def _sub_packer(k):
+    p = _packer_by_count.get(k)
+    if p is None:
+        p = _packer_by_count[k] = (struct.Struct('<' + _SUB_FMT * k).pack,
+                                   bytes(SUBMODULE_STRUCT_SIZE * (8 - k)))
+    return p
+
 def crc16_ccitt(data: bytes, initial=0xFFFF):
-    """ Standard CRC-16-CCITT (0x1021) matching ESP32 rom/crc.h crc16_be """
-    crc = initial
-    for byte in data:
-        crc ^= (byte << 8)
-        for _ in range(8):
-            if crc & 0x8000:
-                crc = (crc << 1) ^ 0x1021
-            else:
-                crc <<= 1
-            crc &= 0xFFFF
-    return crc
+    """ Standard CRC-16-CCITT (0x1021) matching ESP32 rom/crc.h crc16_be; binascii.crc_hqx is the same CRC in C """
+    return binascii.crc_hqx(data, initial)
 
 class LogBuffer:
     def __init__(self, max_lines=LOG_MAX_LINES):
         self.lines = deque(maxlen=max_lines)
         self.lock = threading.Lock()
+        self.seq = 0  # bumped per add; the deque length stops changing once it is full
 
     def add(self, text: str):
         ts = time.strftime('%H:%M:%S')
         with self.lock:
             self.lines.append(f"[{ts}] {text}")
+            self.seq += 1
+
+    def add_many(self, texts):
+        # Several lines under one timestamp and one lock round-trip
+        ts = time.strftime('%H:%M:%S')
+        with self.lock:
+            self.lines.extend(f"[{ts}] {text}" for text in texts)
+            self.seq += 1
 
     def tail(self, n):
+        # Walk in from the right end so only n entries are visited, not the whole buffer
         with self.lock:
-            return list(self.lines)[-n:]
+            out = list(islice(reversed(self.lines), n))
+        out.reverse()
+        return out
+
+class NodeState:
+    __slots__ = ('heartbeat', 'knob', 'temp', 'last', 'node_type_msg', 'sub_mod_cnt',
+                 'reported_crc', 'subs', 'interview_complete', 'calculated_crc', 'mem_size',
+                 'id_str', 'crc_str')
+
+    def __init__(self, node_id: int):
+        self.heartbeat = None
+        self.knob = None
+        self.temp = None
+        self.last = None
+        self.node_type_msg = 0
+        self.sub_mod_cnt = 0
+        self.reported_crc = 0
+        self.subs = {}  # idx -> {'cfg', 'telemetry', 'intro_id'}
+        self.interview_complete = False
+        self.calculated_crc = 0
+        self.mem_size = 0
+        # Display strings, formatted once instead of on every render
+        self.id_str = f"0x{node_id:08X}"
+        self.crc_str = ""
+
+    def set_calculated_crc(self, crc: int):
+        self.calculated_crc = crc
+        if crc == self.reported_crc:
+            self.crc_str = f"[green]MATCH 0x{crc:04X}[/]"
+        else:
+            self.crc_str = f"[red]FAIL C:0x{crc:04X} R:0x{self.reported_crc:04X}[/]"
 
 class CANState:
     def __init__(self, logger):
         self.nodes = {}
         self.lock = threading.Lock()
         self.logger = logger
+        self.dirty = True  # set on any node update, cleared by the UI when it rebuilds the layout
 
     def touch(self, node_id: int):
         with self.lock:
-            nd = self.nodes.setdefault(node_id, {
-                'heartbeat': None, 'knob': None, 'temp': None, 'last': None,
-                'node_type_msg': 0, 'sub_mod_cnt': 0, 'reported_crc': 0,
-                'subs': {}, 'interview_complete': False, 'calculated_crc': 0,
-                'mem_size': 0
-            })
-            nd['last'] = time.time()
+            nd = self.nodes.get(node_id)
+            if nd is None:
+                nd = self.nodes[node_id] = NodeState(node_id)
+            nd.last = time.time()
+            self.dirty = True
             return nd
 
     def calculate_node_crc(self, node_id: int):
         nd = self.nodes[node_id]
-        buf = bytearray(NODEINFO_STRUCT_SIZE) 
-        
-        for i in range(8):
-            offset = i * SUBMODULE_STRUCT_SIZE
-            if i in nd['subs']:
-                s = nd['subs'][i]
-                # [0:3] Config
-                if s['cfg']:
-                    buf[offset:offset+3] = s['cfg']
-                
-                # Based on your Serial Dump: 00 01 07 10 02 08 06 01
-                # Byte 8: 00 (Padding)
-                # Byte 9: 01 (Intro ID Low?) 
-                # Actually, 0x0701 is likely the ID. 
-                # Let's pack them exactly as seen in the dump:
-                
-                # [9:11] introMsgId
-                struct.pack_into('<H', buf, offset + 9, s['intro_id'])
-                # [11:13] dataMsgId
-                if s['telemetry']:
-                    struct.pack_into('<H', buf, offset + 11, s['telemetry']['id'])
-                    # [13] introMsgDLC
-                    buf[offset + 13] = 8 # Default
-                    # [14] dataMsgDLC
-                    buf[offset + 14] = s['telemetry']['dlc']
-                    # [15] saveState
-                    buf[offset + 15] = 1 if s['telemetry']['save'] else 0
+        subs = nd.subs
+        fields = []
+        k = max((i + 1 for i in subs if i < 8), default=0)
+        pack_subs, zero_tail = _sub_packer(k)
+        for i in range(k):
+            s = subs.get(i)
+            if s is None:
+                fields += _EMPTY_SUB
+                continue
+            tele = s['telemetry']
+            if tele:
+                # introMsgDLC defaults to 8
+                fields += (s['cfg'] or b'', s['intro_id'], tele['id'], 8, tele['dlc'], 1 if tele['save'] else 0)
+            else:
+                fields += (s['cfg'] or b'', s['intro_id'], 0, 0, 0, 0)
 
         # --- Metadata (Starts at 0x80) ---
         # Matches your dump: 84 6D A5 25 9C 07 08 02
-        struct.pack_into('<I', buf, 128, node_id)           
-        struct.pack_into('<H', buf, 132, nd['node_type_msg'])
-        buf[134] = 8                                        
-        buf[135] = nd['sub_mod_cnt']                        
+        buf = pack_subs(*fields) + zero_tail + _META_STRUCT.pack(node_id, nd.node_type_msg, 8, nd.sub_mod_cnt)
 
         # Log Hexdump
-        self.logger.add(f"Memory Reconstructed for 0x{node_id:08X}:")
-        for i in range(0, NODEINFO_STRUCT_SIZE, 16):
-            chunk = buf[i:i+16]
-            hex_str = " ".join(f"{b:02X}" for b in chunk)
-            self.logger.add(f"{i:04X}: {hex_str}")
+        dump = [f"Memory Reconstructed for 0x{node_id:08X}:"]
+        dump += [f"{i:04X}: {buf[i:i+16].hex(' ').upper()}" for i in range(0, NODEINFO_STRUCT_SIZE, 16)]
+        self.logger.add_many(dump)
 
         return crc16_ccitt(buf)
 
@@ -131,83 +173,154 @@ class CANState:
             data = []
             for node_id in ids:
                 nd = self.nodes[node_id]
-                age = int(now - nd['last']) if nd['last'] else 0
-                crc_status = ""
-                if nd['interview_complete']:
-                    if nd['calculated_crc'] == nd['reported_crc']:
-                        crc_status = f"[green]MATCH 0x{nd['calculated_crc']:04X}[/]"
-                    else:
-                        crc_status = f"[red]FAIL C:0x{nd['calculated_crc']:04X} R:0x{nd['reported_crc']:04X}[/]"
-
+                age = int(now - nd.last) if nd.last else 0
                 data.append({
-                    'id': node_id, 'age': age, 'knob': nd['knob'] or "-",
-                    'temp': nd['temp'] or "-", 'crc_str': crc_status,
-                    'subs_text': f"{len(nd['subs'])}/{nd['sub_mod_cnt']} mods"
+                    'id': nd.id_str, 'age': age,
+                    'knob': nd.knob if nd.knob is not None else "-",
+                    'temp': nd.temp if nd.temp is not None else "-",
+                    'crc_str': nd.crc_str,
+                    'subs_text': f"{len(nd.subs)}/{nd.sub_mod_cnt} mods"
                 })
             return data
 
+class SPSCRing:
+    """
+    Fixed-size single-producer / single-consumer ring for reader -> UI handoff.
+    Only the reader thread advances 'head' and only the UI thread advances 'tail';
+    each is a single attribute store under the GIL, so no lock is taken.
+    """
+    def __init__(self, capacity=1024):
+        self._buf = [None] * capacity
+        self._cap = capacity
+        self.head = 0  # total items pushed
+        self.tail = 0  # total items popped
+
+    def try_push(self, item):
+        """ Producer side. Drops the item and returns False when the ring is full. """
+        head = self.head
+        if head - self.tail >= self._cap:
+            return False
+        self._buf[head % self._cap] = item
+        self.head = head + 1
+        return True
+
+    def try_pop(self):
+        """ Consumer side. Returns None when the ring is empty. """
+        tail = self.tail
+        if tail == self.head:
+            return None
+        i = tail % self._cap
+        item = self._buf[i]
+        self._buf[i] = None
+        self.tail = tail + 1
+        return item
+
+    def drain(self):
+        """ Consumer side. Takes everything pushed so far as a list, in at most two slice copies. """
+        tail, head = self.tail, self.head
+        n = head - tail
+        if n == 0:
+            return []
+        buf, cap = self._buf, self._cap
+        start = tail % cap
+        end = start + n
+        if end <= cap:
+            out = buf[start:end]
+            buf[start:end] = [None] * n
+        else:
+            end -= cap
+            out = buf[start:] + buf[:end]
+            buf[start:] = [None] * (cap - start)
+            buf[:end] = [None] * end
+        self.tail = head
+        return out
+
 class App:
     def __init__(self, bus, iface):
         self.bus = bus
         self.iface = iface
         self.log = LogBuffer()
         self.state = CANState(self.log)
-        self.q = queue.Queue()
+        self.q = SPSCRing(RX_RING_SIZE)
         self.stop_event = threading.Event()
-        self.reader_thread = threading.Thread(target=self._reader_loop, daemon=True)
+        # Frames arrive through a can.Notifier. With an asyncio loop it watches the bus fd directly
+        # (SocketCAN), so nothing wakes up while the bus is silent.
+        self._rx_loop = asyncio.new_event_loop()
+        self._rx_thread = threading.Thread(target=self._rx_loop.run_forever, daemon=True)
+        self.notifier = None
+        self.key_thread = threading.Thread(target=self._key_loop, daemon=True)
+        self._wake = threading.Event()  # set per received frame and per key press
+        self._keys = deque()  # filled by the key thread, handled on the UI thread
         self.is_windows = (platform.system().lower() == "windows")
+        self._drawn_sec = None
+        self._drawn_log_seq = None
+        # Fixed-ID frame handlers; the interview range is checked separately
+        self._handlers = {
+            KNOB_ID: self._on_knob,
+            TEMP_ID: self._on_temp,
+        }
 
-    def _reader_loop(self):
-        while not self.stop_event.is_set():
-            try:
-                msg = self.bus.recv(timeout=0.1)
-                if msg: self.q.put(msg)
-            except Exception: pass
+    def _on_frame(self, msg):
+        # Notifier callback, runs on the RX loop thread
+        self.q.try_push(msg)  # full ring drops the frame rather than blocking the reader
+        self._wake.set()
 
     def _process_queue(self):
-        while not self.q.empty():
-            msg = self.q.get_nowait()
+        get_handler = self._handlers.get
+        on_interview = self._on_interview
+        for msg in self.q.drain():
             arb_id = msg.arbitration_id
-            dlc = len(msg.data)
-
-            if arb_id == KNOB_ID and dlc >= 6:
-                node_id, val = struct.unpack('>IH', msg.data[:6])
-                self.state.touch(node_id)['knob'] = val
-            elif arb_id == TEMP_ID and dlc >= 8:
-                node_id, celsius = struct.unpack('>If', msg.data[:8])
-                self.state.touch(node_id)['temp'] = celsius
+            handler = get_handler(arb_id)
+            if handler:
+                handler(msg.data)
             elif 0x700 <= arb_id <= 0x7FF:
-                if dlc < 4: continue
-                node_id = struct.unpack('>I', msg.data[0:4])[0]
-                node = self.state.touch(node_id)
-                if node['interview_complete']: continue 
-
-                if node['sub_mod_cnt'] == 0:
-                    if dlc >= 7:
-                        node['node_type_msg'] = arb_id
-                        node['sub_mod_cnt'] = msg.data[4]
-                        node['reported_crc'] = (msg.data[5] << 8) | msg.data[6]
-                        self.log.add(f"Started Interview 0x{node_id:08X}")
-                else:
-                    if dlc >= 5:
-                        m_byte = msg.data[4]
-                        idx, is_b = m_byte & 0x7F, bool(m_byte & 0x80)
-                        if idx not in node['subs']:
-                            node['subs'][idx] = {'cfg': None, 'telemetry': None, 'intro_id': arb_id}
-                        
-                        if not is_b and dlc >= 8:
-                            node['subs'][idx]['cfg'] = bytes(msg.data[5:8])
-                        elif is_b and dlc >= 8:
-                            node['subs'][idx]['telemetry'] = {
-                                'id': (msg.data[5] << 8) | msg.data[6],
-                                'dlc': msg.data[7] & 0x0F,
-                                'save': bool(msg.data[7] & 0x80)
-                            }
-                            if (idx + 1) >= node['sub_mod_cnt']:
-                                node['interview_complete'] = True
-                                node['calculated_crc'] = self.state.calculate_node_crc(node_id)
-
-                self.bus.send(can.Message(arbitration_id=ACK_INTRO_ID, data=struct.pack('>I', node_id)))
+                on_interview(arb_id, msg.data)
+
+    # Telemetry
+    def _on_knob(self, data):
+        if len(data) >= 6:
+            node_id, val = _U32U16(data, 0)
+            self.state.touch(node_id).knob = val
+
+    def _on_temp(self, data):
+        if len(data) >= 8:
+            node_id, celsius = _U32F(data, 0)
+            self.state.touch(node_id).temp = celsius
+
+    # Interview (0x700-0x7FF)
+    def _on_interview(self, arb_id, data):
+        dlc = len(data)
+        if dlc < 4: return
+        node_id = _U32(data, 0)[0]
+        node = self.state.touch(node_id)
+        if node.interview_complete: return 
+
+        if node.sub_mod_cnt == 0:
+            if dlc >= 7:
+                node.node_type_msg = arb_id
+                node.sub_mod_cnt = data[4]
+                node.reported_crc = _U16(data, 5)[0]
+                self.log.add(f"Started Interview 0x{node_id:08X}")
+        else:
+            if dlc >= 5:
+                m_byte = data[4]
+                idx, is_b = m_byte & 0x7F, bool(m_byte & 0x80)
+                if idx not in node.subs:
+                    node.subs[idx] = {'cfg': None, 'telemetry': None, 'intro_id': arb_id}
+
+                if not is_b and dlc >= 8:
+                    node.subs[idx]['cfg'] = data[5:8]  # slicing msg.data already copies
+                elif is_b and dlc >= 8:
+                    node.subs[idx]['telemetry'] = {
+                        'id': _U16(data, 5)[0],
+                        'dlc': data[7] & 0x0F,
+                        'save': bool(data[7] & 0x80)
+                    }
+                    if (idx + 1) >= node.sub_mod_cnt:
+                        node.interview_complete = True
+                        node.set_calculated_crc(self.state.calculate_node_crc(node_id))
+
+        self.bus.send(can.Message(arbitration_id=ACK_INTRO_ID, data=_P32(node_id)))
 
     def request_broadcast(self):
         self.bus.send(can.Message(arbitration_id=REQ_NODE_INTRO_ID, data=[0]*4))
@@ -222,7 +335,7 @@ class App:
         table.add_column("CRC Status", ratio=1)
 
         for n in self.state.snapshot():
-            table.add_row(f"0x{n['id']:08X}", f"{n['age']}s", n['subs_text'], n['crc_str'])
+            table.add_row(n['id'], f"{n['age']}s", n['subs_text'], n['crc_str'])
 
         layout.split(
             Layout(Text(f" CAN Master | {self.iface} | (q)uit (b)roadcast", style="bold reverse cyan"), size=1),
@@ -231,8 +344,17 @@ class App:
         )
         return layout
 
+    def _render(self):
+        # Record what this layout reflects so the loop doesn't rebuild it until something changes
+        self.state.dirty = False
+        self._drawn_log_seq = self.log.seq
+        self._drawn_sec = int(time.time())
+        return self._build_layout()
+
     def run(self):
-        self.reader_thread.start()
+        # Register the reader before the loop starts; add_reader isn't safe against a running loop
+        self.notifier = can.Notifier(self.bus, [self._on_frame], loop=self._rx_loop)
+        self._rx_thread.start()
         self.request_broadcast()
         
         if not self.is_windows and sys.stdin.isatty():
@@ -241,36 +363,63 @@ class App:
             tty.setcbreak(sys.stdin.fileno())
         
         try:
-            with Live(self._build_layout(), refresh_per_second=10, screen=True) as live:
+            with Live(self._render(), refresh_per_second=10, screen=True) as live:
+                self.key_thread.start()
+                next_draw = time.monotonic() + UI_REFRESH_SECONDS
                 while not self.stop_event.is_set():
+                    # Sleep until a frame or key arrives or the next redraw is due; both are drained on every wake
+                    if self._wake.wait(timeout=max(0.0, next_draw - time.monotonic())):
+                        self._wake.clear()
                     self._process_queue()
-                    key = self._get_key()
-                    if key == 'q': self.stop_event.set()
-                    if key == 'b': self.request_broadcast()
-                    live.update(self._build_layout())
-                    time.sleep(0.05)
+                    while self._keys:
+                        key = self._keys.popleft()
+                        if key == 'q': self.stop_event.set()
+                        if key == 'b': self.request_broadcast()
+                    now = time.monotonic()
+                    if now >= next_draw:
+                        next_draw = now + UI_REFRESH_SECONDS
+                        # Rebuild only when a node or the log changed, or the Age column needs to tick
+                        if self.state.dirty or self.log.seq != self._drawn_log_seq or int(time.time()) != self._drawn_sec:
+                            live.update(self._render())
         finally:
+            # Stop the Notifier on its own loop thread (remove_reader isn't thread-safe), then the loop
+            if self.notifier is not None:
+                self._rx_loop.call_soon_threadsafe(self.notifier.stop)
+            self._rx_loop.call_soon_threadsafe(self._rx_loop.stop)
+            self._rx_thread.join(timeout=2.0)
             if not self.is_windows and sys.stdin.isatty():
                 termios.tcsetattr(sys.stdin, termios.TCSADRAIN, orig_settings)
 
+    def _key_loop(self):
+        # Keys are read on their own thread so the UI loop never polls stdin
+        while not self.stop_event.is_set():
+            key = self._get_key()
+            if key is None: return  # stdin closed
+            self._keys.append(key)
+            self._wake.set()
+
     def _get_key(self):
+        # Blocking single-key read; the terminal is already in cbreak mode
         if self.is_windows:
             import msvcrt
-            return msvcrt.getwch().lower() if msvcrt.kbhit() else None
+            return msvcrt.getwch().lower()
         else:
-            import select
-            dr, _, _ = select.select([sys.stdin], [], [], 0)
-            return sys.stdin.read(1).lower() if dr else None
+            ch = sys.stdin.read(1)
+            return ch.lower() if ch else None
 
 def main():
     parser = argparse.ArgumentParser()
     parser.add_argument("--iface", default=DEFAULT_CAN_INTERFACE)
     args = parser.parse_args()
+    bus = None
     try:
         bus = can.interface.Bus(channel=args.iface, interface='socketcan')
         App(bus, args.iface).run()
     except Exception as e:
         print(f"Error: {e}")
+    finally:
+        # run() has stopped the Notifier by now, so nothing is still reading from the bus
+        if bus is not None: bus.shutdown()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
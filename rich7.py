@@ -1,5 +1,6 @@
 #!/usr/bin/env python3
 import time
+import binascii
 import struct
 import threading
 import queue
@@ -31,31 +32,58 @@ DATA_CFGWRITE_FAILED = 0x528
 SUBMODULE_STRUCT_SIZE = 16
 NODEINFO_STRUCT_SIZE  = 136
 NVS_TIMEOUT_SECONDS   = 5 # Max time to wait for ESP32 flash confirmation
+UI_REFRESH_SECONDS    = 0.1 # Redraw interval; the loop itself wakes per frame or key
+
+# Precompiled big-endian wire formats: [ID_32][value]
+_U32    = struct.Struct('>I').unpack_from
+_P32    = struct.Struct('>I').pack
+_P32U16 = struct.Struct('>IH').pack
+
+# subModule_t: cfg[3], 6 bytes padding, introMsgId @9, dataMsgId @11, introMsgDLC, dataMsgDLC, saveState
+_SUB_FMT = '3s6xHHBBB'
+# Whole nodeInfo_t: 8 subModule_t then nodeID, nodeTypeMsg, nodeTypeDLC, subModCnt at 0x80.
+# pack_into writes every byte, pad bytes included, so the scratch buffer never needs clearing
+_NODEINFO_STRUCT = struct.Struct('<' + _SUB_FMT * 8 + 'IHBB')
+_EMPTY_SUB = (b'', 0, 0, 0, 0, 0)  # unused slot: all zero
+
+_hms_last = (None, "")
+
+def _now_hms():
+    # strftime at most once per second; everything printed within the same second reuses the string.
+    # One tuple swap, so a reader on another thread never pairs a new second with an old string
+    global _hms_last
+    t = int(time.time())
+    if _hms_last[0] != t:
+        _hms_last = (t, time.strftime('%H:%M:%S', time.localtime(t)))
+    return _hms_last[1]
 
 def crc16_ccitt(data: bytes, initial=0xFFFF):
-    # Standard CRC-16-CCITT (0x1021) matching ESP32 rom/crc.h crc16_be
-    crc = initial
-    for byte in data:
-        crc ^= (byte << 8)
-        for _ in range(8):
-            if crc & 0x8000:
-                crc = (crc << 1) ^ 0x1021
-            else:
-                crc <<= 1
-            crc &= 0xFFFF
-    return crc
+    # Standard CRC-16-CCITT (0x1021) matching ESP32 rom/crc.h crc16_be; binascii.crc_hqx is the same CRC in C
+    return binascii.crc_hqx(data, initial)
+
+class Sub:
+    # One subModule_t as learned from the interview; tel_id stays None until the telemetry frame arrives
+    __slots__ = ('cfg', 'intro_id', 'tel_id', 'tel_dlc', 'tel_save')
+
+    def __init__(self, intro_id: int):
+        self.cfg = None
+        self.intro_id = intro_id
+        self.tel_id = None
+        self.tel_dlc = 0
+        self.tel_save = False
 
 class CANState:
     def __init__(self, logger):
         self.nodes = {}
         self.lock = threading.Lock()
         self.logger = logger
+        self._crc_buf = bytearray(NODEINFO_STRUCT_SIZE)  # scratch nodeInfo_t image, UI thread only
 
     def touch(self, node_id: int):
         with self.lock:
             nd = self.nodes.setdefault(node_id, {
                 'node_type_msg': 0, 'sub_mod_cnt': 0, 'reported_crc': 0,
-                'subs': {}, 'interview_complete': False, 'calculated_crc': 0,
+                'subs': [None] * 8, 'interview_complete': False, 'calculated_crc': 0,
                 'last_rx': time.time(), 'nvs_status': "Pending",
                 'nvs_timestamp': 0
             })
@@ -64,29 +92,22 @@ class CANState:
 
     def calculate_node_crc(self, node_id: int):
         nd = self.nodes[node_id]
-        buf = bytearray(NODEINFO_STRUCT_SIZE) 
+        subs = nd['subs']
         active_mods = min(nd['sub_mod_cnt'], 8)
-        
-        for i in range(active_mods):
-            offset = i * SUBMODULE_STRUCT_SIZE
-            if i in nd['subs']:
-                s = nd['subs'][i]
-                if s['cfg']:
-                    buf[offset:offset+3] = s['cfg'][:3]
-                
-                # Hardware padding/offsets: [9:11] introMsgId, [11:13] dataMsgId
-                struct.pack_into('<H', buf, offset + 9, s['intro_id'])
-                if s['telemetry']:
-                    struct.pack_into('<H', buf, offset + 11, s['telemetry']['id'])
-                    buf[offset + 13] = 8 
-                    buf[offset + 14] = s['telemetry']['dlc']
-                    buf[offset + 15] = 1 if s['telemetry']['save'] else 0
-
-        # Metadata at 0x80
-        struct.pack_into('<I', buf, 128, node_id)           
-        struct.pack_into('<H', buf, 132, nd['node_type_msg'])
-        buf[134] = 8                                        
-        buf[135] = nd['sub_mod_cnt']                        
+        fields = []
+        for i in range(8):
+            s = subs[i] if i < active_mods else None
+            if s is None:
+                fields += _EMPTY_SUB
+            # introMsgDLC is always 8; '3s' truncates/zero-pads cfg like the old [:3] slice
+            elif s.tel_id is not None:
+                fields += (s.cfg or b'', s.intro_id, s.tel_id, 8, s.tel_dlc, 1 if s.tel_save else 0)
+            else:
+                fields += (s.cfg or b'', s.intro_id, 0, 0, 0, 0)
+
+        # One C call lays out all 136 bytes, metadata at 0x80 included
+        buf = self._crc_buf
+        _NODEINFO_STRUCT.pack_into(buf, 0, *fields, node_id, nd['node_type_msg'], 8, nd['sub_mod_cnt'])
 
         return crc16_ccitt(buf)
 
@@ -94,21 +115,54 @@ class App:
     def __init__(self, bus, iface):
         self.bus, self.iface = bus, iface
         self.log_lines = deque(maxlen=15)
+        self._log_text = ""  # joined log_lines, rebuilt only after add_log
+        self._log_dirty = False
         self.state = CANState(self)
-        self.q = queue.Queue()
         self.stop_event = threading.Event()
-        self.reader = threading.Thread(target=self._reader_loop, daemon=True)
+        # Notifier's thread feeds the reader's internal queue; the UI loop drains it without a second hand-off
+        self._can_reader = can.BufferedReader()
+        self._notifier = None  # started by run(), so constructing an App doesn't begin reading the bus
+        self._wake = threading.Event()  # set per received frame and per key press
+        self._keys = deque()  # filled by the key thread, handled on the UI thread
+        self._tx_errors = deque()  # filled by the writer thread, logged on the UI thread
+        self.key_thread = threading.Thread(target=self._key_loop, daemon=True)
+        # Outgoing frames; the socket write happens on the writer thread, not inside frame processing
+        self.send_q = queue.SimpleQueue()
+        self.writer_thread = threading.Thread(target=self._writer_loop, daemon=True)
+        # Frames with fixed payloads, built once. Queued frames are never mutated, so resending the same object is safe
+        self._intro_req_msg = can.Message(arbitration_id=REQ_NODE_INTRO_ID, data=[0]*4)
+        self._ack_msgs = {}     # node_id -> ACK_INTRO_ID frame
+        self._reboot_msgs = {}  # node_id -> CFG_REBOOT_ID frame
         self.is_windows = (platform.system().lower() == "windows")
+        # Bumped whenever nodes or log_lines change; the layout is only rebuilt when this (or the second) moves
+        self._state_version = 0
+        self._drawn_version = -1
+        self._drawn_sec = None
 
     def add_log(self, text):
-        self.log_lines.append(f"[{time.strftime('%H:%M:%S')}] {text}")
+        self.log_lines.append(f"[{_now_hms()}] {text}")
+        self._log_dirty = True
+        self._state_version += 1
 
-    def _reader_loop(self):
-        while not self.stop_event.is_set():
+    def _on_frame(self, msg):
+        # Runs on the Notifier thread after the BufferedReader has queued the frame
+        self._wake.set()
+
+    def _node_msg(self, cache, arb_id, node_id):
+        msg = cache.get(node_id)
+        if msg is None:
+            msg = cache[node_id] = can.Message(arbitration_id=arb_id, data=_P32(node_id))
+        return msg
+
+    def _writer_loop(self):
+        while True:
+            msg = self.send_q.get()
             try:
-                msg = self.bus.recv(timeout=0.1)
-                if msg: self.q.put(msg)
-            except Exception: pass
+                self.bus.send(msg)
+            except Exception as e:
+                # Keep the writer alive; log state belongs to the UI thread, so hand the error over
+                self._tx_errors.append(f"TX 0x{msg.arbitration_id:03X} failed: {e}")
+                self._wake.set()
 
     def _process_queue(self):
         # 1. Check for NVS Timeouts
@@ -120,20 +174,16 @@ class App:
                     self.add_log(f"Node 0x{nid:08X}: NVS Write Timed Out")
 
         # 2. Process incoming messages
-        while not self.q.empty():
-            msg = self.q.get_nowait()
+        get_message = self._can_reader.get_message
+        while True:
+            msg = get_message(timeout=0.0)
+            if msg is None: break
+            self._state_version += 1
             arb_id, data = msg.arbitration_id, msg.data
 
-            # Telemetry or Interview Frame - Touch the node for heartbeat
-            # We assume node ID is in the first 4 bytes of most relevant frames
-            if len(data) >= 4:
-                node_id_guess = struct.unpack('>I', data[0:4])[0]
-                # Filter for IDs we expect to be valid to avoid ghost nodes
-                if 0x10000000 <= node_id_guess <= 0xFFFFFFFF:
-                    self.state.touch(node_id_guess)
-
+            # Each branch touches its node exactly once; the interview and NVS branches do it themselves
             if 0x700 <= arb_id <= 0x7FF:
-                node_id = struct.unpack('>I', data[0:4])[0]
+                node_id = _U32(data, 0)[0]
                 node = self.state.touch(node_id)
                 if not node['interview_complete']:
                     if node['sub_mod_cnt'] == 0:
@@ -144,40 +194,52 @@ class App:
                     else:
                         idx, is_b = data[4] & 0x7F, bool(data[4] & 0x80)
                         if idx < 8:
-                            if idx not in node['subs']:
-                                node['subs'][idx] = {'cfg': None, 'telemetry': None, 'intro_id': arb_id}
+                            s = node['subs'][idx]
+                            if s is None:
+                                s = node['subs'][idx] = Sub(arb_id)
                             if not is_b:
-                                node['subs'][idx]['cfg'] = bytes(data[5:8])
+                                s.cfg = bytes(data[5:8])
                             else:
-                                node['subs'][idx]['telemetry'] = {'id': (data[5] << 8) | data[6], 'dlc': data[7] & 0x0F, 'save': bool(data[7] & 0x80)}
+                                s.tel_id = (data[5] << 8) | data[6]
+                                s.tel_dlc = data[7] & 0x0F
+                                s.tel_save = bool(data[7] & 0x80)
                                 if (idx + 1) >= node['sub_mod_cnt']:
                                     node['interview_complete'] = True
                                     node['calculated_crc'] = self.state.calculate_node_crc(node_id)
                     
-                    self.bus.send(can.Message(arbitration_id=ACK_INTRO_ID, data=struct.pack('>I', node_id)))
+                    self.send_q.put(self._node_msg(self._ack_msgs, ACK_INTRO_ID, node_id))
 
             elif arb_id == DATA_CONFIG_CRC_ID:
-                nid = struct.unpack('>I', data[0:4])[0]
+                nid = _U32(data, 0)[0]
                 n = self.state.touch(nid)
                 n['nvs_status'] = "[bold green]Success[/]"
                 self.add_log(f"Node 0x{nid:08X}: NVS Saved. Sending Reboot...")
-                self.bus.send(can.Message(arbitration_id=CFG_REBOOT_ID, data=struct.pack('>I', nid)))
+                self.send_q.put(self._node_msg(self._reboot_msgs, CFG_REBOOT_ID, nid))
             
             elif arb_id == DATA_CFGWRITE_FAILED:
-                nid = struct.unpack('>I', data[0:4])[0]
+                nid = _U32(data, 0)[0]
                 self.state.touch(nid)['nvs_status'] = "[bold red]Failed[/]"
                 self.add_log(f"Node 0x{nid:08X}: NVS Write Failed")
 
+            elif len(data) >= 4:
+                # Any other telemetry frame: touch the node for heartbeat
+                # We assume node ID is in the first 4 bytes of most relevant frames
+                node_id_guess = _U32(data, 0)[0]
+                # Filter for IDs we expect to be valid to avoid ghost nodes
+                if 0x10000000 <= node_id_guess <= 0xFFFFFFFF:
+                    self.state.touch(node_id_guess)
+
     def provision_nodes(self):
         now = time.time()
         with self.state.lock:
             for nid, n in self.state.nodes.items():
                 if n['interview_complete'] and n['calculated_crc'] == n['reported_crc']:
-                    payload = struct.pack('>I H', nid, n['calculated_crc'])
-                    self.bus.send(can.Message(arbitration_id=CFG_WRITE_NVS_ID, data=payload))
+                    payload = _P32U16(nid, n['calculated_crc'])
+                    self.send_q.put(can.Message(arbitration_id=CFG_WRITE_NVS_ID, data=payload))
                     n['nvs_status'] = "Writing..."
                     n['nvs_timestamp'] = now
                     self.add_log(f"Requesting NVS write for 0x{nid:08X}")
+        self._state_version += 1
 
     def _build_layout(self):
         table = Table(show_header=True, header_style="bold cyan", expand=True, box=None)
@@ -193,7 +255,7 @@ class App:
                 hb = int(now - n['last_rx'])
                 hb_str = f"{hb}s" if hb < 999 else ">999s"
                 
-                mod_summary = [f"M{i}:[dim]0x{s['telemetry']['id']:03X}[/]" for i, s in n['subs'].items() if s['telemetry']]
+                mod_summary = [f"M{i}:[dim]0x{s.tel_id:03X}[/]" for i, s in enumerate(n['subs']) if s is not None and s.tel_id is not None]
                 
                 crc_str = ""
                 if n['interview_complete']:
@@ -202,49 +264,84 @@ class App:
                 
                 table.add_row(f"0x{nid:08X}", hb_str, " ".join(mod_summary), crc_str, n['nvs_status'])
 
+        if self._log_dirty:
+            self._log_text = "\n".join(self.log_lines)
+            self._log_dirty = False
+
         l = Layout()
         l.split(
             Layout(Text(f" CAN Master | {self.iface} | (q)uit (b)roadcast (p)ersist", style="bold reverse green"), size=1),
             Layout(table, name="body"),
-            Layout(Panel(Text("\n".join(self.log_lines)), title="System Log", border_style="blue"), size=10)
+            Layout(Panel(Text(self._log_text), title="System Log", border_style="blue"), size=10)
         )
         return l
 
+    def _render(self):
+        # Record what this layout reflects; the heartbeat column is whole seconds, so it only ticks once a second
+        self._drawn_version = self._state_version
+        self._drawn_sec = int(time.time())
+        return self._build_layout()
+
     def run(self):
-        self.reader.start()
-        self.bus.send(can.Message(arbitration_id=REQ_NODE_INTRO_ID, data=[0]*4))
+        self._notifier = can.Notifier(self.bus, [self._can_reader, self._on_frame], timeout=0.1)
+        self.writer_thread.start()
+        self.send_q.put(self._intro_req_msg)
         if not self.is_windows and sys.stdin.isatty():
             import termios, tty
             orig = termios.tcgetattr(sys.stdin)
             tty.setcbreak(sys.stdin.fileno())
         try:
-            with Live(self._build_layout(), refresh_per_second=10, screen=True) as live:
+            with Live(self._render(), refresh_per_second=10, screen=True) as live:
+                self.key_thread.start()
+                next_draw = time.monotonic() + UI_REFRESH_SECONDS
                 while not self.stop_event.is_set():
+                    # Sleep until a frame or key arrives or the next redraw is due; the deadline keeps heartbeats and NVS timeouts ticking
+                    if self._wake.wait(timeout=max(0.0, next_draw - time.monotonic())):
+                        self._wake.clear()
                     self._process_queue()
-                    key = self._get_key()
-                    if key == 'q': self.stop_event.set()
-                    if key == 'b': self.bus.send(can.Message(arbitration_id=REQ_NODE_INTRO_ID, data=[0]*4))
-                    if key == 'p': self.provision_nodes()
-                    live.update(self._build_layout())
-                    time.sleep(0.05)
+                    while self._keys:
+                        key = self._keys.popleft()
+                        if key == 'q': self.stop_event.set()
+                        if key == 'b': self.send_q.put(self._intro_req_msg)
+                        if key == 'p': self.provision_nodes()
+                    while self._tx_errors:
+                        self.add_log(self._tx_errors.popleft())
+                    now = time.monotonic()
+                    if now >= next_draw:
+                        next_draw = now + UI_REFRESH_SECONDS
+                        if self._state_version != self._drawn_version or int(time.time()) != self._drawn_sec:
+                            live.update(self._render())
         finally:
+            self._notifier.stop()  # joins the reader thread before the caller shuts the bus down
             if not self.is_windows and sys.stdin.isatty():
                 termios.tcsetattr(sys.stdin, termios.TCSADRAIN, orig)
 
+    def _key_loop(self):
+        # Blocking key reads live on their own thread so the UI loop never polls stdin
+        while not self.stop_event.is_set():
+            key = self._get_key()
+            if key is None: return  # stdin closed
+            self._keys.append(key)
+            self._wake.set()
+
     def _get_key(self):
+        # Blocking single-key read; the terminal is already in cbreak mode
         if self.is_windows:
             import msvcrt
-            return msvcrt.getwch().lower() if msvcrt.kbhit() else None
+            return msvcrt.getwch().lower()
         else:
-            import select
-            dr, _, _ = select.select([sys.stdin], [], [], 0)
-            return sys.stdin.read(1).lower() if dr else None
+            ch = sys.stdin.read(1)
+            return ch.lower() if ch else None
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("--iface", default="can0")
     args = parser.parse_args()
+    bus = None
     try:
         bus = can.interface.Bus(channel=args.iface, interface='socketcan')
         App(bus, args.iface).run()
-    except Exception as e: print(f"Error: {e}")
\ No newline at end of file
+    except Exception as e: print(f"Error: {e}")
+    finally:
+        # run() has stopped the Notifier by now, so nothing is still reading from the bus
+        if bus is not None: bus.shutdown()
\ No newline at end of file
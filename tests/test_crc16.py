@@ -0,0 +1,65 @@
+"""
+crc16_ccitt in rich3/rich4/rich5-interview and rich7 is binascii.crc_hqx; check it still matches
+the bit-serial CRC-16-CCITT (ESP32 rom crc16_be) it replaced.
+Run from the repo root: python -m unittest discover -s tests
+"""
+import importlib.util
+import unittest
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+SCRIPTS = ("rich3-interview.py", "rich4-interview.py", "rich5-interview.py", "rich7.py")
+# rich3's crc16_ccitt has no seed argument
+SEEDED_SCRIPTS = ("rich4-interview.py", "rich5-interview.py", "rich7.py")
+# nodeInfo_t images dumped from real nodes (136 bytes each)
+NODE_IMAGES = sorted(ROOT.glob("node_*_dump.bin"))
+
+def load_script(name):
+    spec = importlib.util.spec_from_file_location(name.replace("-", "_")[:-3], ROOT / name)
+    mod = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(mod)
+    return mod
+
+def crc16_bitwise(data, crc=0xFFFF):
+    # The loop crc16_ccitt used before switching to crc_hqx: poly 0x1021, MSB first
+    for byte in data:
+        crc ^= (byte << 8)
+        for _ in range(8):
+            if crc & 0x8000:
+                crc = (crc << 1) ^ 0x1021
+            else:
+                crc <<= 1
+            crc &= 0xFFFF
+    return crc
+
+class Crc16CcittTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.funcs = {name: load_script(name).crc16_ccitt for name in SCRIPTS}
+
+    def test_check_value(self):
+        for name, crc16_ccitt in self.funcs.items():
+            with self.subTest(script=name):
+                self.assertEqual(crc16_ccitt(b"123456789"), 0x29B1)
+
+    def test_matches_bitwise_on_node_images(self):
+        self.assertTrue(NODE_IMAGES)
+        for path in NODE_IMAGES:
+            image = path.read_bytes()
+            self.assertEqual(len(image), 136)
+            expected = crc16_bitwise(image)
+            for name, crc16_ccitt in self.funcs.items():
+                with self.subTest(script=name, image=path.name):
+                    self.assertEqual(crc16_ccitt(image), expected)
+                    self.assertEqual(crc16_ccitt(bytearray(image)), expected)
+
+    def test_matches_bitwise_with_other_seeds(self):
+        for path in NODE_IMAGES:
+            image = path.read_bytes()
+            for name in SEEDED_SCRIPTS:
+                for seed in (0x0000, 0x1D0F, 0xFFFF):
+                    with self.subTest(script=name, image=path.name, seed=seed):
+                        self.assertEqual(self.funcs[name](image, seed), crc16_bitwise(image, seed))
+
+if __name__ == "__main__":
+    unittest.main()